@@ -0,0 +1,312 @@
+from lazy_imports import lazy_import
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Additive metrics rolled up for every dimension
+SUM_METRICS = ['impressions', 'clicks', 'cost', 'conversions', 'conversion_value']
+
+# Row-level rate columns whose plain mean is reported in the summary
+MEAN_METRICS = ['ctr', 'conversion_rate']
+
+# Label of the row the long tail is folded into by top-N roll-ups
+OTHER_LABEL = 'Other'
+
+# Buckets derived from the date column instead of being read from the frame
+DATE_BUCKETS = {
+    # ISO week, labelled by its Monday
+    'week': lambda dates: (dates - pd.to_timedelta(dates.dt.weekday, unit='D')).dt.strftime('%Y-%m-%d'),
+    'month': lambda dates: dates.dt.strftime('%Y-%m')
+}
+
+
+def safe_divide(numerator, denominator, scale=1.0):
+    # Element-wise numerator / denominator * scale, with 0 wherever the denominator is 0
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.zeros(np.broadcast(numerator, denominator).shape, dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out * scale if scale != 1.0 else out
+
+
+def rank_groups(rank, n):
+    # (top, rest): indices of the n largest rank values, largest first, and a mask of the others.
+    # argpartition keeps this O(groups) plus a sort of only the n winners.
+    if len(rank) > n:
+        top = np.argpartition(-rank, n - 1)[:n]
+    else:
+        top = np.arange(len(rank))
+    top = top[np.argsort(-rank[top], kind='stable')]
+    rest = np.ones(len(rank), dtype=bool)
+    rest[top] = False
+    return top, rest
+
+
+def bucket_long_tail(labels, sums, rank, n, other_label=OTHER_LABEL):
+    # Keep the n top-ranked groups (ordered by rank) and fold the rest into one trailing
+    # other_label row. sums arrays hold one value per group on their last axis. Returns
+    # (labels, sums, grouped, is_other): grouped counts the original groups behind each row and
+    # is_other marks the folded row, which may hold a single group or share a real group's label.
+    top, rest = rank_groups(rank, n)
+    labels = np.asarray(labels, dtype=object)[top]
+    grouped = np.ones(len(top), dtype=np.int64)
+    is_other = np.zeros(len(top), dtype=bool)
+    if not rest.any():
+        return labels, {m: v[..., top] for m, v in sums.items()}, grouped, is_other
+
+    sums = {m: np.concatenate([v[..., top], v[..., rest].sum(axis=-1, keepdims=True)], axis=-1)
+            for m, v in sums.items()}
+    return np.append(labels, other_label), sums, np.append(grouped, rest.sum()), np.append(is_other, True)
+
+
+def derived_metrics(sums):
+    # ROI, CPA, CTR, CPC and conversion rate from summed metrics (scalars or arrays)
+    return {
+        'roi': safe_divide(sums['conversion_value'] - sums['cost'], sums['cost'], 100.0),
+        'cpa': safe_divide(sums['cost'], sums['conversions']),
+        'ctr': safe_divide(sums['clicks'], sums['impressions'], 100.0),
+        'cpc': safe_divide(sums['cost'], sums['clicks']),
+        'conversion_rate': safe_divide(sums['conversions'], sums['clicks'], 100.0)
+    }
+
+
+def ranked_rows(df, n, rank_by='cost'):
+    # Rows that are already one per entity (drill-down totals): the n largest by rank_by, largest
+    # first (every row when n is 0), with the derived metrics added
+    top, _ = rank_groups(df[rank_by].to_numpy(dtype=np.float64), n or len(df))
+    rows = df.iloc[top].reset_index(drop=True)
+    return rows.assign(**derived_metrics({m: rows[m].to_numpy(dtype=np.float64) for m in SUM_METRICS}))
+
+
+# Computes every requested roll-up from a single read of each metric column.
+# Each dimension is factorized once into integer codes and each metric is summed
+# with np.bincount, so an extra breakdown costs one bincount per metric rather
+# than another groupby over the whole frame. Week/month buckets are derived from
+# the (few) unique dates, not from every row.
+class Aggregator:
+    def __init__(self, df, metrics=SUM_METRICS):
+        self.df = df
+        self.metrics = [m for m in metrics if m in df]
+        self.rows = len(df)
+        self._values = {m: df[m].to_numpy(dtype=np.float64) for m in self.metrics}
+        self._integer = {m for m in self.metrics if pd.api.types.is_integer_dtype(df[m].dtype)}
+        self._codes = {}
+
+    def _factorize(self, dimension):
+        if dimension in self._codes:
+            return self._codes[dimension]
+
+        if dimension in DATE_BUCKETS and dimension not in self.df:
+            date_codes, dates = self._factorize('date')
+            buckets = DATE_BUCKETS[dimension](pd.Series(pd.to_datetime(dates)))
+            bucket_codes, uniques = pd.factorize(buckets, sort=True)
+            result = (bucket_codes[date_codes], np.asarray(uniques))
+        else:
+            # Factorize unsorted, then sort only the (few) uniques and remap the codes
+            codes, uniques = pd.factorize(self.df[dimension], use_na_sentinel=False)
+            order = np.argsort(uniques, kind='stable')
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            result = (rank[codes], np.asarray(uniques)[order])
+
+        self._codes[dimension] = result
+        return result
+
+    def _finish(self, sums):
+        # Integer metrics (impressions, clicks) stay integers in the output
+        return {m: np.rint(v).astype(np.int64) if m in self._integer else v for m, v in sums.items()}
+
+    def totals(self):
+        return self._finish({m: self._values[m].sum() for m in self.metrics})
+
+    # top_n: keep the top_n groups by the rank_by sum (largest first) plus an 'Other' row for the
+    # rest, with a 'grouped' column counting the groups behind each row and an 'is_other' flag
+    def rollup(self, dimension, label=None, derived=True, top_n=None, rank_by='cost'):
+        codes, uniques = self._factorize(dimension)
+        sums = {m: np.bincount(codes, weights=self._values[m], minlength=len(uniques)) for m in self.metrics}
+        grouped = None
+        if top_n:
+            uniques, sums, grouped, is_other = bucket_long_tail(uniques, sums, sums[rank_by], top_n)
+
+        columns = {label or dimension: uniques}
+        columns.update(self._finish(sums))
+        if derived:
+            columns.update(derived_metrics(sums))
+        if grouped is not None:
+            columns['grouped'] = grouped
+            columns['is_other'] = is_other
+        return pd.DataFrame(columns)
+
+    def summary(self):
+        totals = self.totals()
+        summary = {
+            'total_cost': float(totals.get('cost', 0)),
+            'total_clicks': int(totals.get('clicks', 0)),
+            'total_impressions': int(totals.get('impressions', 0)),
+            'total_conversions': float(totals.get('conversions', 0))
+        }
+        for column in MEAN_METRICS:
+            mean = self.df[column].to_numpy(dtype=np.float64).mean() if column in self.df and self.rows else 0
+            summary[f'avg_{column}'] = float(mean)
+        return summary
+
+
+# Accumulates the same roll-ups as Aggregator batch by batch, keeping only the grouped
+# sums (one row per date/campaign/...) so memory stays bounded however many rows stream in.
+class IncrementalAggregator:
+    def __init__(self, dimensions, metrics=SUM_METRICS):
+        self.dimensions = dimensions
+        self.metrics = metrics
+        self.rows = 0
+        self._integer = set()
+        self._totals = {m: 0.0 for m in metrics}
+        self._mean_sums = {m: 0.0 for m in MEAN_METRICS}
+        self._rollups = {dimension: None for dimension in dimensions}
+
+    def add(self, df):
+        if df.empty:
+            return
+        batch = Aggregator(df, self.metrics)
+        self._integer |= batch._integer
+        self.rows += batch.rows
+        for m, value in batch.totals().items():
+            self._totals[m] += float(value)
+        for m in MEAN_METRICS:
+            if m in df:
+                self._mean_sums[m] += float(df[m].to_numpy(dtype=np.float64).sum())
+
+        for dimension in self.dimensions:
+            sums = batch.rollup(dimension, derived=False).set_index(dimension).astype(np.float64)
+            current = self._rollups[dimension]
+            self._rollups[dimension] = sums if current is None else current.add(sums, fill_value=0)
+
+    def totals(self):
+        return {m: int(round(v)) if m in self._integer else v for m, v in self._totals.items()}
+
+    def rollup(self, dimension, label=None, derived=True, top_n=None, rank_by='cost'):
+        sums = self._rollups[dimension]
+        if sums is None:
+            return pd.DataFrame(columns=[label or dimension] + self.metrics)
+        sums = sums.sort_index()
+        labels = sums.index.to_numpy()
+        sums = {m: sums[m].to_numpy() for m in self.metrics}
+        grouped = None
+        if top_n:
+            labels, sums, grouped, is_other = bucket_long_tail(labels, sums, sums[rank_by], top_n)
+
+        columns = {label or dimension: labels}
+        columns.update({m: np.rint(sums[m]).astype(np.int64) if m in self._integer else sums[m] for m in self.metrics})
+        if derived:
+            columns.update(derived_metrics(sums))
+        if grouped is not None:
+            columns['grouped'] = grouped
+            columns['is_other'] = is_other
+        return pd.DataFrame(columns)
+
+    def summary(self):
+        totals = self.totals()
+        summary = {
+            'total_cost': float(totals.get('cost', 0)),
+            'total_clicks': int(totals.get('clicks', 0)),
+            'total_impressions': int(totals.get('impressions', 0)),
+            'total_conversions': float(totals.get('conversions', 0))
+        }
+        for column in MEAN_METRICS:
+            summary[f'avg_{column}'] = self._mean_sums[column] / self.rows if self.rows else 0.0
+        return summary
+
+
+# Current vs previous period from one frame holding the rows of both (equal-length) periods.
+# Rows are tagged with their period and their day offset inside it from the unique dates only,
+# then every breakdown is one bincount per metric over (period, group) codes: one pass over
+# the combined rows instead of aggregating each period separately and joining the results.
+class PeriodComparison:
+    def __init__(self, df, current, previous, metrics=SUM_METRICS):
+        # current / previous: (start_date, end_date) as 'YYYY-MM-DD'
+        self.aggregator = Aggregator(df, metrics)
+        self.metrics = self.aggregator.metrics
+        self.current = current
+        self.previous = previous
+        current_start = np.datetime64(current[0], 'D')
+        previous_start = np.datetime64(previous[0], 'D')
+        self.days = int((np.datetime64(current[1], 'D') - current_start).astype(np.int64)) + 1
+
+        codes, dates = self.aggregator._factorize('date')
+        dates = np.asarray(dates).astype('datetime64[D]')
+        current_offset = (dates - current_start).astype(np.int64)
+        previous_offset = (dates - previous_start).astype(np.int64)
+        in_current = (current_offset >= 0) & (current_offset < self.days)
+        in_previous = (previous_offset >= 0) & (previous_offset < self.days) & ~in_current
+        self._period = np.where(in_current, 0, np.where(in_previous, 1, -1))[codes]
+        self._offset = np.where(in_current, current_offset, previous_offset)[codes]
+        keep = self._period >= 0
+        self._keep = None if keep.all() else keep
+
+    def _sums(self, codes, size):
+        # {metric: (2, size)} with row 0 the current and row 1 the previous period
+        groups = self._period * size + codes
+        if self._keep is not None:
+            groups = groups[self._keep]
+        sums = {}
+        for m in self.metrics:
+            values = self.aggregator._values[m]
+            if self._keep is not None:
+                values = values[self._keep]
+            sums[m] = np.bincount(groups, weights=values, minlength=2 * size).reshape(2, size)
+        return sums
+
+    def _periods(self, sums):
+        # Finished sums plus derived rates for the current and the previous period
+        periods = []
+        for row in (0, 1):
+            period_sums = {m: v[row] for m, v in sums.items()}
+            values = self.aggregator._finish(period_sums)
+            values.update(derived_metrics(period_sums))
+            periods.append(values)
+        return periods
+
+    def _columns(self, sums):
+        # metric, previous_metric, metric_change and metric_change_pct for sums and derived rates
+        current, previous = self._periods(sums)
+        columns = {}
+        for name in current:
+            change = current[name] - previous[name]
+            columns[name] = current[name]
+            columns[f'previous_{name}'] = previous[name]
+            columns[f'{name}_change'] = change
+            columns[f'{name}_change_pct'] = safe_divide(change, previous[name], 100.0)
+        return columns
+
+    def summary(self):
+        current, previous = self._periods(self._sums(np.zeros(len(self._period), dtype=np.int64), 1))
+        change = {name: current[name] - previous[name] for name in current}
+        return {
+            'current': {name: value[0].item() for name, value in current.items()},
+            'previous': {name: value[0].item() for name, value in previous.items()},
+            'change': {name: value[0].item() for name, value in change.items()},
+            'change_pct': {name: safe_divide(change[name], previous[name], 100.0)[0].item() for name in current}
+        }
+
+    def daily(self):
+        # Day N of the current period next to day N of the previous one
+        offsets = np.arange(self.days)
+        columns = {
+            'day': offsets,
+            'date': np.datetime_as_string(np.datetime64(self.current[0], 'D') + offsets).astype(object),
+            'previous_date': np.datetime_as_string(np.datetime64(self.previous[0], 'D') + offsets).astype(object)
+        }
+        columns.update(self._columns(self._sums(self._offset, self.days)))
+        return pd.DataFrame(columns)
+
+    def rollup(self, dimension, label=None, top_n=None, rank_by='cost'):
+        # Groups seen in only one period report zeros for the other; top_n ranks by the current period
+        codes, uniques = self.aggregator._factorize(dimension)
+        sums = self._sums(codes, len(uniques))
+        grouped = None
+        if top_n:
+            uniques, sums, grouped, is_other = bucket_long_tail(uniques, sums, sums[rank_by][0], top_n)
+        columns = {label or dimension: uniques}
+        columns.update(self._columns(sums))
+        if grouped is not None:
+            columns['grouped'] = grouped
+            columns['is_other'] = is_other
+        return pd.DataFrame(columns)
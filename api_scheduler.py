@@ -0,0 +1,263 @@
+import random
+import threading
+import time
+from instrumentation import API_CALLS_TOTAL, record_span
+
+# gRPC status codes worth retrying: quota / rate limits and transient server or network trouble.
+# Anything else (bad query, permission, authentication) fails the same way on every attempt.
+TRANSIENT_CODES = ('RESOURCE_EXHAUSTED', 'UNAVAILABLE', 'DEADLINE_EXCEEDED', 'ABORTED', 'INTERNAL')
+
+
+def status_code(error):
+    # gRPC status name of a GoogleAdsException (.error is the grpc.Call) or a raw grpc.RpcError;
+    # checked by name to stay import-free
+    call = getattr(error, 'error', error)
+    try:
+        return call.code().name
+    except (AttributeError, TypeError):
+        return None
+
+
+def _seconds(duration):
+    # Duration as a timedelta (proto-plus) or a protobuf Duration (raw messages)
+    if hasattr(duration, 'total_seconds'):
+        return duration.total_seconds()
+    return getattr(duration, 'seconds', 0) + getattr(duration, 'nanos', 0) / 1e9
+
+
+def suggested_delay(error):
+    # Wait the API asks for in a quota error's QuotaErrorDetails, in seconds (None if absent)
+    for detail in getattr(getattr(error, 'failure', None), 'errors', ()):
+        quota = getattr(getattr(detail, 'details', None), 'quota_error_details', None)
+        delay = _seconds(getattr(quota, 'retry_delay', None))
+        if delay > 0:
+            return delay
+    return None
+
+
+# Raised instead of (another) API call: the request budget would take longer than max_wait to
+# free up, the circuit breaker is open, or a transient error outlasted the retries.
+# retry_after: seconds after which trying again makes sense (None if unknown)
+class ApiUnavailableError(Exception):
+    def __init__(self, message, retry_after=None, code=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.code = code
+
+
+# Classic token bucket: `rate` requests per second on average, up to `burst` at once.
+# reserve() always takes a token and returns how long the caller has to wait for it; the
+# balance goes negative while callers queue, so waiters are served in arrival order.
+class TokenBucket:
+    def __init__(self, rate, burst):
+        # rate 0 = unlimited
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._paused_until - now, 0.0)
+            if self.rate <= 0:
+                return wait
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens < 0:
+                wait = max(wait, -self._tokens / self.rate)
+            return wait
+
+    def cancel(self):
+        # Give back a reserved token the caller will not use
+        with self._lock:
+            if self.rate > 0:
+                self._tokens = min(self.burst, self._tokens + 1)
+
+    def pause(self, seconds):
+        # After RESOURCE_EXHAUSTED nobody gets a token until the quota had time to recover
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+# Stops calling the API while it keeps failing: failure_threshold transient errors in a row open
+# the breaker, every call is then rejected for reset_seconds, after which one trial call is let
+# through (half-open). Its success closes the breaker, its failure opens it again.
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        # None when a call may go ahead, else the seconds until a trial call will be allowed
+        with self._lock:
+            if self.state == 'closed':
+                return None
+            remaining = self._opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0:
+                return remaining
+            if self._trial:
+                return self.reset_seconds
+            self.state = 'half_open'
+            self._trial = True
+            return None
+
+    def cancel(self):
+        # An allowed call that never reached the API frees the trial slot
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                print("Google Ads API circuit breaker closed")
+            self.state = 'closed'
+            self.failures = 0
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                print(f"Google Ads API circuit breaker open for {self.reset_seconds:g}s after {self.failures} failures")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+def _first_batch(response):
+    # (first batch or None, iterator over the rest) of a search_stream response
+    response = iter(response)
+    for batch in response:
+        return batch, response
+    return None, response
+
+
+# Every Google Ads call goes through one scheduler per worker process:
+#   - request budgets: one token bucket for the developer token and one per customer; a call
+#     waits for both (up to max_wait) instead of running into the API's rate limits
+#   - retries: transient gRPC errors are retried with full-jitter exponential backoff (or the
+#     delay a quota error asks for), and RESOURCE_EXHAUSTED pauses the developer budget so
+#     concurrent callers back off together instead of each retrying into the limit
+#   - a circuit breaker that fails calls fast while the API keeps failing
+# Budgets are per process: with several gunicorn workers, size the rates for one worker's share.
+class ApiScheduler:
+    def __init__(self, developer_rate=20.0, developer_burst=40, customer_rate=5.0, customer_burst=10,
+                 max_wait=20.0, max_retries=4, base_delay=0.5, max_delay=20.0,
+                 failure_threshold=5, reset_seconds=30.0):
+        self.developer_bucket = TokenBucket(developer_rate, developer_burst)
+        self.customer_rate = customer_rate
+        self.customer_burst = customer_burst
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        # A retry waits in _admit like any call, so it can never be given longer than max_wait
+        self.max_delay = min(max_delay, max_wait)
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self._customer_buckets = {}
+        self._lock = threading.Lock()
+
+    def _customer_bucket(self, customer_id):
+        with self._lock:
+            bucket = self._customer_buckets.get(customer_id)
+            if bucket is None:
+                bucket = self._customer_buckets[customer_id] = TokenBucket(self.customer_rate, self.customer_burst)
+            return bucket
+
+    def _admit(self, customer_id):
+        # Wait for the breaker and both budgets, or raise ApiUnavailableError
+        closed_in = self.breaker.allow()
+        if closed_in is not None:
+            API_CALLS_TOTAL.inc(outcome='rejected')
+            raise ApiUnavailableError("Google Ads API is failing; calls are paused", retry_after=closed_in)
+
+        buckets = [self.developer_bucket]
+        if customer_id:
+            buckets.append(self._customer_bucket(customer_id))
+        wait = max(bucket.reserve() for bucket in buckets)
+        if wait > self.max_wait:
+            for bucket in buckets:
+                bucket.cancel()
+            self.breaker.cancel()
+            API_CALLS_TOTAL.inc(outcome='rejected')
+            raise ApiUnavailableError(f"Google Ads API request budget exhausted (next slot in {wait:.1f}s)",
+                                      retry_after=wait)
+        if wait > 0:
+            time.sleep(wait)
+            record_span('api_queue', wait)
+
+    # Seconds to wait before retrying. A delay the API asks for is honoured as is (call() fails
+    # fast when it is longer than max_wait); our own backoff is capped at max_delay.
+    def backoff(self, attempt, error=None):
+        delay = suggested_delay(error) if error is not None else None
+        if delay:
+            return delay * random.uniform(1.0, 1.2)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    # Run fn() (one API call) under the budgets, retrying transient errors
+    def call(self, customer_id, fn):
+        attempt = 0
+        while True:
+            self._admit(customer_id)
+            try:
+                result = fn()
+            except Exception as e:
+                code = status_code(e)
+                if code not in TRANSIENT_CODES:
+                    # The API answered (or the error is ours): not an outage
+                    self.breaker.record_success()
+                    API_CALLS_TOTAL.inc(outcome='error')
+                    raise
+                self.breaker.record_failure()
+                delay = self.backoff(attempt, e)
+                if code == 'RESOURCE_EXHAUSTED':
+                    # Every caller waits out the quota, this one included (in _admit)
+                    self.developer_bucket.pause(delay)
+                if attempt >= self.max_retries:
+                    API_CALLS_TOTAL.inc(outcome='failed')
+                    raise ApiUnavailableError(f"Google Ads API {code} after {attempt + 1} attempts",
+                                              retry_after=delay, code=code) from e
+                if delay > self.max_wait:
+                    # The API wants a longer pause than a request may queue: fail now with its
+                    # retry_after instead of retrying into a budget rejection
+                    API_CALLS_TOTAL.inc(outcome='failed')
+                    raise ApiUnavailableError(f"Google Ads API {code}, retry in {delay:.1f}s",
+                                              retry_after=delay, code=code) from e
+                API_CALLS_TOTAL.inc(outcome='retried')
+                print(f"Google Ads API {code} for customer ID {customer_id}, retrying in {delay:.2f}s "
+                      f"(attempt {attempt + 1}/{self.max_retries})")
+                if code != 'RESOURCE_EXHAUSTED':
+                    time.sleep(delay)
+                    record_span('api_retry', delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            API_CALLS_TOTAL.inc(outcome='ok')
+            return result
+
+    # Streaming counterpart of call() for search_stream: fn() returns the response iterator.
+    # Errors usually arrive with the first batch, so opening the stream and reading that batch
+    # is retried like call(); once batches have been handed out a transient failure is raised
+    # as ApiUnavailableError (the caller has already consumed part of the stream).
+    def stream(self, customer_id, fn):
+        first, rest = self.call(customer_id, lambda: _first_batch(fn()))
+        if first is None:
+            return
+        yield first
+        try:
+            yield from rest
+        except Exception as e:
+            code = status_code(e)
+            if code not in TRANSIENT_CODES:
+                raise
+            self.breaker.record_failure()
+            raise ApiUnavailableError(f"Google Ads API {code} mid-stream", retry_after=self.backoff(0, e),
+                                      code=code) from e
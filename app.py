@@ -1,18 +1,43 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
-from google.ads.googleads.client import GoogleAdsClient
-from google.ads.googleads.errors import GoogleAdsException
-from google_auth_oauthlib.flow import Flow
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, g
 import os
 import yaml
 import json
-import pandas as pd
-from datetime import datetime, timedelta
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.io as pio
+from datetime import datetime, timedelta, timezone
 from config import Config
-import random
+from lazy_imports import lazy_import
+from warehouse import MetricsWarehouse, contiguous_ranges, date_range
+from client_pool import ClientRegistry
+from multi_account import fetch_accounts
+from decoding import BatchDecoder, ColumnBuffer, CAMPAIGN_FIELDS, CUSTOMER_CLIENT_FIELDS, decode_stream
+from aggregation import Aggregator, IncrementalAggregator, PeriodComparison, SUM_METRICS, ranked_rows
+from cache import TTLCache
+from raw_rows import filter_rows, page_rows
+from serialization import encode_payload, LAYOUTS
+from compression import compress_response, etag_variants
+from prefetch import PrefetchScheduler
+from sample_data import generate_sample_data, parse_channel_mix
+from downsampling import RESOLUTIONS, downsample_comparison, downsample_daily
+from gaql import (PANELS, plan_campaign_query, plan_drilldown_query, validate_date_range, normalize_customer_id,
+                  validate_panels, validate_filters, validate_level, validate_ids, filter_campaign_rows)
+from session_store import init_session
+from token_manager import TokenManager
+from singleflight import SingleFlight
+from api_scheduler import ApiScheduler, ApiUnavailableError
+from instrumentation import (registry as metrics_registry, span, record_span, timed_batches, start_request,
+                             request_spans, server_timing, REQUEST_SECONDS, ROWS_TOTAL)
+import contextvars
+import hashlib
+import hmac
+import math
+import queue
+import threading
+import time
+
+# Heavy dependencies load on first use, not in every worker at startup
+pd = lazy_import('pandas')
+google_ads_client = lazy_import('google.ads.googleads.client')
+google_ads_errors = lazy_import('google.ads.googleads.errors')
+oauth_flow = lazy_import('google_auth_oauthlib.flow')
 
 # For production deployment
 if os.environ.get('FLASK_ENV') == 'production':
@@ -26,7 +51,8 @@ else:
 app = Flask(__name__)
 # Use environment variable for secret key if available (for deployment)
 app.secret_key = os.environ.get('FLASK_SECRET_KEY', Config.SECRET_KEY)
-app.config['SESSION_TYPE'] = 'filesystem'
+# Session data lives server-side; the cookie only carries the session ID
+init_session(app, Config)
 
 # Load Google Ads configuration
 def load_google_ads_config():
@@ -67,14 +93,84 @@ def load_google_ads_config():
 
 google_ads_config = load_google_ads_config()
 
+# Local store of per-campaign daily rows shared by every request in this process
+warehouse = MetricsWarehouse(
+    Config.WAREHOUSE_PATH,
+    settling_days=Config.WAREHOUSE_SETTLING_DAYS,
+    refresh_seconds=Config.WAREHOUSE_REFRESH_SECONDS
+)
+
+# DataFrames of recent queries, served page by page through /raw_data
+frame_cache = TTLCache(max_size=Config.FRAME_CACHE_SIZE, ttl_seconds=Config.FRAME_CACHE_TTL_SECONDS)
+
+# Accessible customers (with names) per credential, so dashboard loads skip the API
+customer_cache = TTLCache(max_size=Config.CUSTOMER_CACHE_SIZE, ttl_seconds=Config.CUSTOMER_CACHE_TTL_SECONDS)
+
+# Drill-down rows (ad groups, keywords, search terms) per campaign, fetched when a campaign is opened
+drilldown_cache = TTLCache(max_size=Config.DRILLDOWN_CACHE_SIZE, ttl_seconds=Config.DRILLDOWN_CACHE_TTL_SECONDS)
+
+# Single-flight for dashboard queries and warehouse syncs (cross-worker via lock files)
+query_flights = SingleFlight(Config.SINGLEFLIGHT_LOCK_DIR)
+
+# Request budgets, retries and the circuit breaker shared by every Google Ads call in this process
+api_scheduler = ApiScheduler(
+    developer_rate=Config.API_DEVELOPER_QPS,
+    developer_burst=Config.API_DEVELOPER_BURST,
+    customer_rate=Config.API_CUSTOMER_QPS,
+    customer_burst=Config.API_CUSTOMER_BURST,
+    max_wait=Config.API_MAX_QUEUE_SECONDS,
+    max_retries=Config.API_MAX_RETRIES,
+    base_delay=Config.API_RETRY_BASE_SECONDS,
+    max_delay=Config.API_RETRY_MAX_SECONDS,
+    failure_threshold=Config.API_BREAKER_FAILURES,
+    reset_seconds=Config.API_BREAKER_RESET_SECONDS
+)
+
+# Build a new Google Ads Client (called by the registry on a cache miss only)
+def build_google_ads_client(refresh_token, login_customer_id):
+    # Debug output to help troubleshoot
+    print(f"Creating Google Ads client with developer_token: {'*' * 5 if google_ads_config.get('developer_token') else 'MISSING'}, "
+          f"client_id: {'*' * 5 if google_ads_config.get('client_id') else 'MISSING'}, "
+          f"refresh_token: {'*' * 5 if refresh_token else 'MISSING'}")
+    
+    # Built directly (not via load_from_dict, which exchanges the refresh token up front) with
+    # credentials that take their access token from the shared token manager
+    return google_ads_client.GoogleAdsClient(
+        credentials=token_manager.credentials(refresh_token),
+        developer_token=google_ads_config['developer_token'],
+        login_customer_id=str(login_customer_id).replace('-', '') if login_customer_id else None,
+        use_proto_plus=Config.GOOGLE_ADS_USE_PROTO_PLUS
+    )
+
+# Access tokens cached per refresh token and refreshed shortly before they expire
+token_manager = TokenManager(
+    google_ads_config.get('client_id'),
+    google_ads_config.get('client_secret'),
+    Config.TOKEN_URI,
+    refresh_margin_seconds=Config.TOKEN_REFRESH_MARGIN_SECONDS
+)
+
+# Keep the session's copy of the access token (and its expiry) in step with the token manager,
+# so a worker that has not seen this user yet can seed its cache instead of refreshing
+@app.after_request
+def sync_session_token(response):
+    credentials = session.get('credentials')
+    if credentials and credentials.get('refresh_token'):
+        token, expires_at = token_manager.cached(credentials['refresh_token'])
+        if token and token != credentials.get('token'):
+            session['credentials'] = dict(credentials, token=token, expires_at=expires_at)
+    return response
+
+# Clients (with their gRPC channels and access tokens) are reused across requests
+client_registry = ClientRegistry(
+    build_google_ads_client,
+    max_size=Config.CLIENT_CACHE_SIZE,
+    ttl_seconds=Config.CLIENT_CACHE_TTL_SECONDS
+)
+
 # Initialize Google Ads Client
 def get_google_ads_client(credentials):
     try:
-        # Debug output to help troubleshoot
-        print(f"Creating Google Ads client with developer_token: {'*' * 5 if google_ads_config.get('developer_token') else 'MISSING'}")
-        print(f"Using client_id: {'*' * 5 if google_ads_config.get('client_id') else 'MISSING'}")
-        print(f"Using refresh_token: {'*' * 5 if credentials.get('refresh_token') else 'MISSING'}")
-        
         # Check for required credentials
         if not google_ads_config.get('developer_token'):
             raise ValueError("Missing developer_token in Google Ads configuration")
@@ -85,23 +181,121 @@ def get_google_ads_client(credentials):
         if not credentials.get('refresh_token'):
             raise ValueError("Missing refresh_token in credentials")
         
-        config = {
-            "developer_token": google_ads_config['developer_token'],
-            "client_id": google_ads_config['client_id'],
-            "client_secret": google_ads_config['client_secret'],
-            "refresh_token": credentials['refresh_token'],
-            "use_proto_plus": True
-        }
-        
-        # Add login_customer_id only if it exists
-        if google_ads_config.get('login_customer_id'):
-            config["login_customer_id"] = google_ads_config['login_customer_id']
-            
-        return GoogleAdsClient.load_from_dict(config)
+        token_manager.seed(credentials['refresh_token'], credentials.get('token'), credentials.get('expires_at'))
+        with span('client'):
+            return client_registry.get(credentials['refresh_token'], google_ads_config.get('login_customer_id'))
     except Exception as e:
         print(f"Error creating Google Ads client: {e}")
         raise
 
+# Warm the warehouse with the default dashboard window for recently opened accounts
+def prefetch_default_window(refresh_token, customer_id):
+    client = client_registry.get(refresh_token, google_ads_config.get('login_customer_id'))
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=Config.PREFETCH_WINDOW_DAYS)).strftime('%Y-%m-%d')
+    sync_warehouse(client, customer_id, start_date, end_date)
+
+prefetch_scheduler = PrefetchScheduler(
+    prefetch_default_window,
+    interval_seconds=Config.PREFETCH_INTERVAL_SECONDS,
+    max_workers=Config.PREFETCH_MAX_WORKERS,
+    recent_seconds=Config.PREFETCH_RECENT_HOURS * 3600,
+    max_accounts=Config.PREFETCH_MAX_ACCOUNTS
+)
+if Config.PREFETCH_ENABLED and Config.PREFETCH_INTERVAL_SECONDS >= Config.WAREHOUSE_REFRESH_SECONDS:
+    print(f"PREFETCH_INTERVAL_SECONDS ({Config.PREFETCH_INTERVAL_SECONDS}) is not below WAREHOUSE_REFRESH_SECONDS "
+          f"({Config.WAREHOUSE_REFRESH_SECONDS}): settling days will often be stale on first load")
+
+def remember_account(credentials, customer_id):
+    if Config.PREFETCH_ENABLED and credentials.get('refresh_token'):
+        prefetch_scheduler.record(credentials['refresh_token'], customer_id)
+
+# Encode a dashboard payload (values may be DataFrames) with the configured JSON encoder.
+# ?layout=columns switches tables to a {columns, data} layout instead of per-row records.
+def dashboard_response(payload, status=200):
+    layout = request.args.get('layout', 'records')
+    if layout not in LAYOUTS:
+        layout = 'records'
+    with span('serialize'):
+        body = encode_payload(payload, layout=layout, encoder=Config.JSON_ENCODER)
+    return app.response_class(body, status=status, mimetype='application/json')
+
+# 503 for a call the scheduler refused or gave up on, with Retry-After when it is known
+def api_unavailable_response(error):
+    response = jsonify({'error': str(error), 'degraded': True, 'retry_after': error.retry_after})
+    response.status_code = 503
+    if error.retry_after:
+        response.headers['Retry-After'] = str(math.ceil(error.retry_after))
+    return response
+
+# Payloads not built from a complete, fresh API answer say so: source is 'warehouse' (rows
+# stored earlier, possibly missing or stale days) or 'sample' (demo data)
+def mark_degraded(payload, source, reason, **details):
+    payload['degraded'] = dict(source=source, reason=reason, **details)
+    return payload
+
+SAMPLE_CHANNEL_MIX = parse_channel_mix(Config.SAMPLE_CHANNEL_MIX)
+NO_DATA_REASON = 'No data returned from Google Ads API'
+
+# Dimensions rolled up for the dashboard charts
+DASHBOARD_DIMENSIONS = ['date', 'campaign_name', 'channel_type', 'status']
+
+# campaign_data is bounded: top CAMPAIGN_TOP_N by CAMPAIGN_RANK_METRIC plus an 'Other' row
+if Config.CAMPAIGN_RANK_METRIC not in SUM_METRICS:
+    raise ValueError(f"CAMPAIGN_RANK_METRIC must be one of {', '.join(SUM_METRICS)}")
+CAMPAIGN_ROLLUP = {'top_n': Config.CAMPAIGN_TOP_N, 'rank_by': Config.CAMPAIGN_RANK_METRIC}
+
+if Config.DAILY_LTTB_METRIC not in SUM_METRICS:
+    raise ValueError(f"DAILY_LTTB_METRIC must be one of {', '.join(SUM_METRICS)}")
+
+# daily_data resolution when a request does not choose one: (resolution, max_points)
+DEFAULT_SERIES = ('auto', Config.DAILY_MAX_POINTS)
+
+# /fetch_data 'compare' modes: the equally long period right before the range, or the same
+# range 52 weeks earlier (weekdays stay aligned)
+COMPARE_MODES = ('previous_period', 'previous_year')
+
+# Bump when the /fetch_data payload format changes so old ETags stop matching
+PAYLOAD_VERSION = 1
+
+# Per-request phase timing: spans recorded while handling the request are reported in a
+# Server-Timing header and every request feeds the latency histograms served on /metrics
+metrics_registry.register_cache('frame', frame_cache)
+metrics_registry.register_cache('customer', customer_cache)
+metrics_registry.register_cache('client', client_registry)
+metrics_registry.register_cache('token', token_manager)
+metrics_registry.register_cache('drilldown', drilldown_cache)
+metrics_registry.register_cache('singleflight', query_flights)
+
+@app.before_request
+def start_timing():
+    start_request()
+    g.request_started = time.perf_counter()
+
+# Registered before compress so it runs after it (after_request hooks run in reverse order)
+@app.after_request
+def add_server_timing(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    total = time.perf_counter() - started
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUEST_SECONDS.observe(total, endpoint=endpoint, method=request.method, status=response.status_code)
+    response.headers['Server-Timing'] = server_timing(request_spans(), total)
+    return response
+
+# Compress JSON responses negotiated from Accept-Encoding (brotli when installed, else gzip)
+@app.after_request
+def compress(response):
+    with span('compress'):
+        return compress_response(
+            response,
+            request.accept_encodings,
+            min_size=Config.COMPRESS_MIN_BYTES,
+            gzip_level=Config.COMPRESS_GZIP_LEVEL,
+            brotli_quality=Config.COMPRESS_BROTLI_QUALITY
+        )
+
 # Routes
 @app.route('/')
 def index():
@@ -128,7 +322,7 @@ def login():
     if not client_config['web']['client_id']:
         return "Error: CLIENT_ID environment variable is not set. Please configure the OAuth credentials.", 500
     
-    flow = Flow.from_client_config(
+    flow = oauth_flow.Flow.from_client_config(
         client_config=client_config,
         scopes=["https://www.googleapis.com/auth/adwords", "openid", "https://www.googleapis.com/auth/userinfo.profile", "https://www.googleapis.com/auth/userinfo.email"],
         redirect_uri=os.environ.get('REDIRECT_URI', Config.REDIRECT_URI)
@@ -169,7 +363,7 @@ def oauth2callback():
     print(f"OAuth callback - client_id: {client_config['web']['client_id']}")
     print(f"OAuth callback - redirect_uri: {client_config['web']['redirect_uris'][0]}")
     
-    flow = Flow.from_client_config(
+    flow = oauth_flow.Flow.from_client_config(
         client_config=client_config,
         scopes=["https://www.googleapis.com/auth/adwords", "openid", "https://www.googleapis.com/auth/userinfo.profile", "https://www.googleapis.com/auth/userinfo.email"],
         redirect_uri=os.environ.get('REDIRECT_URI', Config.REDIRECT_URI),
@@ -180,16 +374,18 @@ def oauth2callback():
     authorization_response = request.url.replace('http://', 'https://') if request.url.startswith('http://') else request.url
     flow.fetch_token(authorization_response=authorization_response)
     
-    # Store credentials in session
+    # Store only the user's tokens; client ID/secret and token URI come from the app config
     credentials = flow.credentials
     session['credentials'] = {
         'token': credentials.token,
         'refresh_token': credentials.refresh_token,
-        'token_uri': credentials.token_uri,
-        'client_id': credentials.client_id,
-        'client_secret': credentials.client_secret,
-        'scopes': credentials.scopes
+        'expires_at': credentials.expiry.replace(tzinfo=timezone.utc).timestamp() if credentials.expiry else None
     }
+    # The token from the code exchange is reused until it nears expiry
+    if credentials.refresh_token:
+        token_manager.seed(credentials.refresh_token, credentials.token, session['credentials']['expires_at'])
+    # New session ID at login so a pre-login ID cannot be reused (session fixation)
+    app.session_interface.regenerate(session)
     
     return redirect(url_for('dashboard'))
 
@@ -202,20 +398,26 @@ def dashboard():
     end_date = datetime.now().strftime('%Y-%m-%d')
     start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
     
-    # Get accessible customer IDs
+    # Get accessible customers (cached per credential; ?refresh=1 reloads them)
+    page = {}
     try:
         credentials = session.get('credentials')
         client = get_google_ads_client(credentials)
-        customer_ids = get_accessible_customers(client)
-        print(f"Found {len(customer_ids)} customer accounts")
+        customers = get_customer_directory(client, credentials, refresh=request.args.get('refresh') == '1')
+        print(f"Found {len(customers)} customer accounts")
+    except ApiUnavailableError as e:
+        # Quota or outage: say so on the page instead of listing accounts the user does not have
+        print(f"Google Ads API unavailable: {str(e)}")
+        customers = []
+        mark_degraded(page, 'directory', str(e), retry_after=e.retry_after)
     except Exception as e:
         # Handle the case where Google Ads client can't be created
         print(f"Error getting customers: {e}")
-        # Generate sample data for demonstration
-        customer_ids = ['1234567890', '0987654321']
-        print("Using sample customer IDs for demonstration")
+        customers = []
+        mark_degraded(page, 'directory', str(e))
     
-    return render_template('dashboard.html', customer_ids=customer_ids, start_date=start_date, end_date=end_date)
+    return render_template('dashboard.html', customers=customers, start_date=start_date, end_date=end_date,
+                           degraded=page.get('degraded'))
 
 @app.route('/fetch_data', methods=['POST'])
 def fetch_data():
@@ -226,22 +428,64 @@ def fetch_data():
     customer_id = data.get('customer_id')
     start_date = data.get('start_date')
     end_date = data.get('end_date')
+    compare = data.get('compare')
     
     # Validate input data
     if not customer_id or not start_date or not end_date:
         return jsonify({'error': 'Missing required parameters'}), 400
+    try:
+        # Ensure customer_id is properly formatted (hyphens removed, ten digits)
+        customer_id = normalize_customer_id(customer_id)
+        validate_date_range(start_date, end_date)
+        previous = comparison_period(start_date, end_date, compare) if compare else None
+        series = series_options(data)
+        panels = validate_panels(data.get('panels'))
+        filters = validate_filters(data.get('filters'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Log request details for debugging
-    print(f"Fetching data for customer_id: {customer_id}, date range: {start_date} to {end_date}")
+    print(f"Fetching data for customer_id: {customer_id}, date range: {start_date} to {end_date}"
+          + (f", compared with {previous[0]} to {previous[1]}" if previous else ""))
     
     try:
         credentials = session['credentials']
         client = get_google_ads_client(credentials)
         
+        access_error = account_access_error(client, credentials, [customer_id])
+        if access_error is not None:
+            return access_error
+        
+        remember_account(credentials, customer_id)
+        
         # Try to fetch real campaign data
         try:
-            campaign_data = fetch_campaign_data(client, customer_id, start_date, end_date)
-            return jsonify(campaign_data)
+            # Bring the warehouse up to date first: an unchanged range is answered with 304
+            etag = None
+            if not projected_query(customer_id, start_date, end_date, previous, panels):
+                ranges = query_ranges(start_date, end_date, previous)
+                for range_start, range_end in ranges:
+                    sync_warehouse(client, customer_id, range_start, range_end)
+                etag = campaign_etag([customer_id], ranges[0][0], end_date, {
+                    'start_date': start_date, 'previous': previous, 'series': series, 'panels': panels,
+                    'filters': filters
+                })
+            if etag and any(request.if_none_match.contains(tag) for tag in etag_variants(etag)):
+                print(f"Data unchanged for customer_id: {customer_id}, returning 304")
+                session['last_query'] = {'customer_ids': [customer_id], 'start_date': start_date, 'end_date': end_date}
+                response = app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+            
+            campaign_data = fetch_campaign_data(client, customer_id, start_date, end_date, previous, series,
+                                                panels, filters, credentials=credentials)
+        except ApiUnavailableError as e:
+            # Quota or outage: answer from whatever the warehouse holds, flagged, or with a 503
+            print(f"Google Ads API unavailable: {str(e)}")
+            campaign_data = stored_campaign_data(customer_id, start_date, end_date, previous, series, panels, filters, e)
+            if campaign_data is None:
+                return api_unavailable_response(e)
+            etag = None
         except Exception as e:
             print(f"Error fetching real data: {str(e)}")
             import traceback
@@ -249,23 +493,286 @@ def fetch_data():
             
             # Fall back to sample data
             print("Falling back to sample data")
-            sample_data = generate_sample_data(start_date, end_date)
-            return jsonify(sample_data)
+            df = sample_frame(previous[0] if previous else start_date, end_date)
+            df, campaign_data = campaign_visualizations(df, start_date, end_date, previous, series, panels, filters)
+            mark_degraded(campaign_data, 'sample', str(e))
+            cache_query_frame([customer_id], start_date, end_date, df)
+            etag = None
+        
+        # Remember the query so /raw_data can page through its rows
+        session['last_query'] = {'customer_ids': [customer_id], 'start_date': start_date, 'end_date': end_date}
+        response = dashboard_response(campaign_data)
+        if etag:
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     except Exception as e:
         print(f"Error in fetch_data: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/fetch_data_stream', methods=['POST'])
+def fetch_data_stream():
+    if 'credentials' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    data = request.json
+    customer_id = data.get('customer_id')
+    start_date = data.get('start_date')
+    end_date = data.get('end_date')
+    
+    # Validate input data
+    if not customer_id or not start_date or not end_date:
+        return jsonify({'error': 'Missing required parameters'}), 400
+    try:
+        customer_id = normalize_customer_id(customer_id)
+        validate_date_range(start_date, end_date)
+        series = series_options(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    print(f"Streaming data for customer_id: {customer_id}, date range: {start_date} to {end_date}")
+    
+    try:
+        credentials = session['credentials']
+        client = get_google_ads_client(credentials)
+        access_error = account_access_error(client, credentials, [customer_id])
+        if access_error is not None:
+            return access_error
+        remember_account(credentials, customer_id)
+    except Exception as e:
+        print(f"Error in fetch_data_stream: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    
+    layout = request.args.get('layout', 'records')
+    if layout not in LAYOUTS:
+        layout = 'records'
+    
+    # The session cookie is sent with the headers, before the body starts streaming
+    session['last_query'] = {'customer_ids': [customer_id], 'start_date': start_date, 'end_date': end_date}
+    
+    def generate():
+        try:
+            for message in stream_campaign_data(client, customer_id, start_date, end_date, series):
+                yield encode_payload(message, layout=layout, encoder=Config.JSON_ENCODER) + b'\n'
+        except Exception as e:
+            print(f"Error streaming data: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            message = {'type': 'error', 'error': str(e)}
+            if isinstance(e, ApiUnavailableError):
+                message.update(degraded=True, retry_after=e.retry_after)
+            yield encode_payload(message, encoder=Config.JSON_ENCODER) + b'\n'
+    
+    response = app.response_class(generate(), mimetype='application/x-ndjson')
+    # Keep reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/fetch_data_multi', methods=['POST'])
+def fetch_data_multi():
+    if 'credentials' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    data = request.json
+    customer_ids = data.get('customer_ids')
+    start_date = data.get('start_date')
+    end_date = data.get('end_date')
+    
+    # Validate input data
+    if not start_date or not end_date:
+        return jsonify({'error': 'Missing required parameters'}), 400
+    try:
+        validate_date_range(start_date, end_date)
+        customer_ids = [normalize_customer_id(c) for c in customer_ids or []]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        credentials = session['credentials']
+        client = get_google_ads_client(credentials)
+        
+        # Roll up every accessible account when no explicit list is given
+        if not customer_ids:
+            customer_ids = [customer['id'] for customer in get_customer_directory(client, credentials)]
+        customer_ids = list(dict.fromkeys(customer_ids))
+        access_error = account_access_error(client, credentials, customer_ids)
+        if access_error is not None:
+            return access_error
+        
+        print(f"Fetching data for {len(customer_ids)} customer accounts, date range: {start_date} to {end_date}")
+        
+        df, errors = fetch_accounts(
+            customer_ids,
+            lambda customer_id: sync_campaign_rows(client, customer_id, start_date, end_date),
+            max_workers=Config.MULTI_ACCOUNT_MAX_WORKERS,
+            per_account_limit=Config.MULTI_ACCOUNT_PER_ACCOUNT_LIMIT
+        )
+        
+        if df.empty:
+            return jsonify({'error': 'No data returned for the selected accounts', 'failed_accounts': errors}), 502
+        
+        cache_query_frame(customer_ids, start_date, end_date, df)
+        session['last_query'] = {'customer_ids': customer_ids, 'start_date': start_date, 'end_date': end_date}
+        
+        # Campaign names are only unique within an account: label each campaign with its account
+        # so same-named campaigns of different accounts stay separate rows
+        labelled = df.assign(campaign_name=df['campaign_name'].astype(str) + ' (' + df['customer_id'].astype(str) + ')')
+        visualizations = build_visualizations(labelled)
+        visualizations['account_data'] = Aggregator(df).rollup('customer_id')
+        visualizations['failed_accounts'] = errors
+        return dashboard_response(visualizations)
+    except ApiUnavailableError as e:
+        print(f"Error in fetch_data_multi: {str(e)}")
+        return api_unavailable_response(e)
+    except Exception as e:
+        print(f"Error in fetch_data_multi: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/raw_data')
+def raw_data():
+    if 'credentials' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    last_query = session.get('last_query')
+    if not last_query:
+        return jsonify({'error': 'No data has been fetched yet'}), 404
+    
+    try:
+        credentials = session['credentials']
+        access_error = account_access_error(get_google_ads_client(credentials), credentials,
+                                            last_query['customer_ids'])
+    except Exception as e:
+        print(f"Error in raw_data: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    if access_error is not None:
+        return access_error
+    
+    df = get_query_frame(last_query['customer_ids'], last_query['start_date'], last_query['end_date'])
+    if df is None:
+        return jsonify({'error': 'Cached data has expired, please fetch the data again'}), 404
+    
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = min(max(int(request.args.get('limit', Config.RAW_PAGE_SIZE)), 1), Config.RAW_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    
+    sort = request.args.get('sort')
+    if sort and sort not in df.columns:
+        return jsonify({'error': f'Unknown sort column: {sort}'}), 400
+    descending = request.args.get('order', 'asc').lower() == 'desc'
+    
+    rows = filter_rows(
+        df,
+        campaign=request.args.get('campaign'),
+        channel=request.args.get('channel'),
+        status=request.args.get('status'),
+        date_from=request.args.get('date_from'),
+        date_to=request.args.get('date_to')
+    )
+    page = page_rows(rows, sort=sort, descending=descending, offset=offset, limit=limit)
+    
+    return dashboard_response({
+        'total': len(rows),
+        'offset': offset,
+        'limit': limit,
+        'next_offset': offset + limit if offset + limit < len(rows) else None,
+        'columns': list(df.columns),
+        'rows': page
+    })
+
+@app.route('/drilldown/<level>', methods=['POST'])
+def drilldown(level):
+    if 'credentials' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    data = request.json or {}
+    customer_id = data.get('customer_id')
+    start_date = data.get('start_date')
+    end_date = data.get('end_date')
+    
+    # Validate input data
+    if not customer_id or not start_date or not end_date:
+        return jsonify({'error': 'Missing required parameters'}), 400
+    try:
+        customer_id = normalize_customer_id(customer_id)
+        validate_date_range(start_date, end_date)
+        validate_level(level)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        credentials = session['credentials']
+        client = get_google_ads_client(credentials)
+        # Campaign names are resolved from stored rows, so access is checked first
+        access_error = account_access_error(client, credentials, [customer_id])
+        if access_error is not None:
+            return access_error
+    except Exception as e:
+        print(f"Error in drilldown: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    
+    try:
+        campaign_ids = data.get('campaign_ids')
+        if not campaign_ids and data.get('campaign_names'):
+            campaign_ids = campaign_ids_for(customer_id, start_date, end_date, data['campaign_names'])
+        campaign_ids = validate_ids(campaign_ids)
+        ad_group_ids = validate_ids(data['ad_group_ids'], 'ad_group_ids') if data.get('ad_group_ids') else ()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    print(f"Drill-down to {level} for customer_id: {customer_id}, campaigns: {', '.join(campaign_ids)}, "
+          f"date range: {start_date} to {end_date}")
+    
+    try:
+        df, fetched = fetch_drilldown(client, customer_id, level, start_date, end_date, campaign_ids, ad_group_ids,
+                                      credentials=credentials)
+        with span('aggregate'):
+            rows = ranked_rows(df, Config.DRILLDOWN_MAX_ROWS)
+        return dashboard_response({
+            'level': level,
+            'campaign_ids': list(campaign_ids),
+            'ad_group_ids': list(ad_group_ids),
+            'fetched_campaign_ids': list(fetched),
+            'total_rows': len(df),
+            'rows': rows
+        })
+    except ApiUnavailableError as e:
+        print(f"Error in drilldown: {str(e)}")
+        return api_unavailable_response(e)
+    except Exception as e:
+        print(f"Error in drilldown: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+# Prometheus text exposition of this worker's histograms, row counters and cache hit rates
+@app.route('/metrics')
+def metrics():
+    if not Config.METRICS_ENABLED:
+        return jsonify({'error': 'Not found'}), 404
+    if Config.METRICS_TOKEN and not hmac.compare_digest(request.headers.get('Authorization', '').encode('utf-8'),
+                                                        f'Bearer {Config.METRICS_TOKEN}'.encode('utf-8')):
+        return jsonify({'error': 'Not authorized'}), 401
+    return app.response_class(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/logout')
 def logout():
+    credentials = session.get('credentials')
+    if credentials and credentials.get('refresh_token'):
+        client_registry.invalidate(credentials['refresh_token'])
+        token_manager.invalidate(credentials['refresh_token'])
+        customer_cache.pop(credential_key(credentials))
+        prefetch_scheduler.forget(credentials['refresh_token'])
     session.pop('credentials', None)
     session.pop('state', None)
+    session.pop('last_query', None)
     return redirect(url_for('index'))
 
 # Helper Functions
 def get_accessible_customers(client):
     try:
         customer_service = client.get_service("CustomerService")
-        response = customer_service.list_accessible_customers()
+        response = api_scheduler.call(None, customer_service.list_accessible_customers)
         customer_ids = []
         
         for resource_name in response.resource_names:
@@ -273,183 +780,567 @@ def get_accessible_customers(client):
             customer_ids.append(customer_id)
         
         return customer_ids
-    except GoogleAdsException as ex:
+    except google_ads_errors.GoogleAdsException as ex:
         print(f"Google Ads API Error: {ex.error.code().name} - {ex.error.message}")
         return []
 
-def fetch_campaign_data(client, customer_id, start_date, end_date):
+# Account details for a manager (level 0 is the account itself, level 1 its direct clients)
+CUSTOMER_CLIENT_QUERY = """
+    SELECT
+        customer_client.id,
+        customer_client.descriptive_name,
+        customer_client.currency_code,
+        customer_client.time_zone,
+        customer_client.manager
+    FROM customer_client
+    WHERE customer_client.level <= 1
+"""
+
+# Look up names, currency and time zone with one customer_client query per account queried,
+# MULTI_ACCOUNT_MAX_WORKERS at a time. A manager's query also covers its direct clients, so the
+# known managers are queried first and the accounts they cover are skipped; everything else
+# (including managers not seen before, whose clients are needed too) is queried in a second round.
+# Returns (details, {manager_id: [the manager and its client IDs]}).
+def enrich_customers(client, customer_ids, managers=()):
+    ga_service = client.get_service("GoogleAdsService")
+    details = {}
+    clients = {}
+    unavailable = []
+    
+    def query(customer_id):
+        try:
+            df, _ = api_scheduler.call(customer_id, lambda: decode_stream(
+                ga_service.search_stream(customer_id=customer_id, query=CUSTOMER_CLIENT_QUERY),
+                BatchDecoder(CUSTOMER_CLIENT_FIELDS)
+            ))
+            return df
+        except google_ads_errors.GoogleAdsException as ex:
+            print(f"Google Ads API Error enriching customer ID {customer_id}: {ex.error.code().name} - {ex.error.message}")
+        except ApiUnavailableError as e:
+            unavailable.append(e)
+        return pd.DataFrame()
+    
+    def enrich(batch):
+        df, _ = fetch_accounts(batch, query, max_workers=Config.MULTI_ACCOUNT_MAX_WORKERS,
+                               per_account_limit=Config.MULTI_ACCOUNT_PER_ACCOUNT_LIMIT)
+        # Quota or outage: the directory is not built (or cached) from a partial answer
+        if unavailable:
+            raise unavailable[0]
+        if df.empty:
+            return
+        for row in df.to_dict(orient='records'):
+            details[str(row['id'])] = {
+                'id': str(row['id']),
+                'descriptive_name': row['descriptive_name'],
+                'currency_code': row['currency_code'],
+                'time_zone': row['time_zone'],
+                'manager': bool(row['manager'])
+            }
+        for customer_id, rows in df.groupby('customer_id'):
+            if details.get(customer_id, {}).get('manager'):
+                clients[customer_id] = [str(account_id) for account_id in rows['id']]
+    
+    first = [customer_id for customer_id in customer_ids if customer_id in managers]
+    enrich(first)
+    enrich([customer_id for customer_id in customer_ids
+            if customer_id not in first and (customer_id not in details or details[customer_id]['manager'])])
+    return details, clients
+
+def credential_key(credentials):
+    token_hash = hashlib.sha256(credentials['refresh_token'].encode('utf-8')).hexdigest()
+    return (token_hash, google_ads_config.get('login_customer_id') or '')
+
+# Accessible customers with their details, plus every account ID the credential may read
+# (the accessible accounts and the direct clients of accessible managers), cached per credential.
+# Details and manager clients are kept in the warehouse, so only accounts never seen before cost
+# an enrichment query. Concurrent first requests of one credential share a single load.
+def load_customer_directory(client, credentials, refresh=False):
+    key = credential_key(credentials)
+    if refresh:
+        customer_cache.pop(key)
+    
+    directory = customer_cache.get(key)
+    if directory is not None:
+        return directory
+    
+    def load():
+        customer_ids = get_accessible_customers(client)
+        known = warehouse.load_customers(customer_ids)
+        managers = [customer_id for customer_id in customer_ids if known.get(customer_id, {}).get('manager')]
+        details = {} if refresh else known
+        clients = {} if refresh else warehouse.load_customer_clients(managers)
+        missing = [customer_id for customer_id in customer_ids
+                   if customer_id not in details or (customer_id in managers and customer_id not in clients)]
+        if missing:
+            # The login customer is normally the manager the others are reached through
+            login_customer_id = (google_ads_config.get('login_customer_id') or '').replace('-', '')
+            enriched, enriched_clients = enrich_customers(client, missing, managers + [login_customer_id])
+            warehouse.store_customers(enriched)
+            warehouse.store_customer_clients(enriched_clients)
+            details.update(enriched)
+            clients.update(enriched_clients)
+        
+        directory = {
+            'customers': [details.get(customer_id, {'id': customer_id}) for customer_id in customer_ids],
+            'account_ids': frozenset(customer_ids).union(*clients.values())
+        }
+        # An empty list usually means the API call failed; do not pin it for a whole TTL
+        if customer_ids:
+            customer_cache.set(key, directory)
+        return directory
+    
+    directory, _ = query_flights.do(('customer_directory', key, refresh), load)
+    return directory
+
+def get_customer_directory(client, credentials, refresh=False):
+    return load_customer_directory(client, credentials, refresh)['customers']
+
+# Warehouse rows, cached frames and stored fallbacks are keyed by customer ID alone, so every
+# route that serves them first checks the session's credential can read those accounts.
+# Returns None when it can, else a 403 (or a 503 while the account list cannot be loaded).
+def account_access_error(client, credentials, customer_ids):
     try:
-        # Ensure customer_id is properly formatted (remove hyphens if present)
-        customer_id = customer_id.replace('-', '')
-        
-        print(f"Executing Google Ads API query for customer ID: {customer_id}")
-        ga_service = client.get_service("GoogleAdsService")
-        query = f"""
-            SELECT 
-                campaign.id, 
-                campaign.name, 
-                campaign.status,
-                campaign.advertising_channel_type,
-                segments.date,
-                metrics.impressions, 
-                metrics.clicks, 
-                metrics.ctr,
-                metrics.average_cpc, 
-                metrics.conversions,
-                metrics.conversions_value, 
-                metrics.cost_micros,
-                metrics.conversions_from_interactions_rate,
-                metrics.interaction_rate,
-                metrics.video_views,
-                metrics.view_through_conversions
-            FROM campaign
-            WHERE segments.date BETWEEN '{start_date}' AND '{end_date}'
-            ORDER BY segments.date
-        """
-        
-        print(f"Query: {query}")
-        
-        # Execute the query
+        allowed = load_customer_directory(client, credentials)['account_ids']
+    except ApiUnavailableError as e:
+        print(f"Cannot check account access: {str(e)}")
+        return api_unavailable_response(e)
+    denied = [customer_id for customer_id in customer_ids if customer_id not in allowed]
+    if denied:
+        print(f"Denied access to customer ID(s): {', '.join(denied)}")
+        return jsonify({'error': f"No access to customer ID(s) {', '.join(denied)}; "
+                                 "reload the dashboard if the account was linked recently",
+                        'denied_customer_ids': denied}), 403
+    return None
+
+# Every campaign field for every panel: what the warehouse stores per campaign and day
+def campaign_query(start_date, end_date):
+    return plan_campaign_query(start_date, end_date)[1]
+
+# Run a GAQL query, decoding each batch straight into typed column buffers. The whole call,
+# stream included, goes through the scheduler, so a transient failure mid-stream is retried
+# from scratch with an empty buffer.
+def run_query(client, customer_id, query, fields=CAMPAIGN_FIELDS):
+    ga_service = client.get_service("GoogleAdsService")
+    
+    print(f"Query: {query}")
+    
+    def execute():
         response = ga_service.search_stream(customer_id=customer_id, query=query)
-        
-        data = []
+        decoder = BatchDecoder(fields)
+        buffer = ColumnBuffer(decoder)
         batch_count = 0
-        row_count = 0
-        
-        # Process the response
-        for batch in response:
+        for batch in timed_batches(response):
             batch_count += 1
-            for row in batch.results:
-                row_count += 1
-                data.append({
-                    "campaign_id": row.campaign.id,
-                    "campaign_name": row.campaign.name,
-                    "status": row.campaign.status.name,
-                    "channel_type": row.campaign.advertising_channel_type.name,
-                    "date": row.segments.date,
-                    "impressions": row.metrics.impressions,
-                    "clicks": row.metrics.clicks,
-                    "ctr": row.metrics.ctr * 100,
-                    "avg_cpc": row.metrics.average_cpc / 1e6,
-                    "conversions": row.metrics.conversions,
-                    "conversion_value": row.metrics.conversions_value,
-                    "cost": row.metrics.cost_micros / 1e6,
-                    "conversion_rate": row.metrics.conversions_from_interactions_rate * 100,
-                    "interaction_rate": row.metrics.interaction_rate * 100,
-                    "video_views": row.metrics.video_views,
-                    "view_through_conversions": row.metrics.view_through_conversions
-                })
-        
-        print(f"Processed {batch_count} batches with {row_count} total rows")
-        
-        # If no data was returned, create sample data for demonstration
-        if not data:
-            print("No data returned from Google Ads API. Creating sample data for demonstration.")
-            # Generate sample data for demonstration purposes
-            data = generate_sample_data(start_date, end_date)
-        
-        # Process data for visualization
-        df = pd.DataFrame(data)
-        
-        # Aggregate data for different visualizations
-        daily_data = df.groupby('date').agg({
-            'impressions': 'sum',
-            'clicks': 'sum',
-            'cost': 'sum',
-            'conversions': 'sum',
-            'conversion_value': 'sum'
-        }).reset_index()
-        
-        campaign_data = df.groupby('campaign_name').agg({
-            'impressions': 'sum',
-            'clicks': 'sum',
-            'cost': 'sum',
-            'conversions': 'sum',
-            'conversion_value': 'sum'
-        }).reset_index()
-        
-        channel_data = df.groupby('channel_type').agg({
-            'impressions': 'sum',
-            'clicks': 'sum',
-            'cost': 'sum',
-            'conversions': 'sum',
-            'conversion_value': 'sum'
-        }).reset_index().rename(columns={'channel_type': 'channel_name'})
-        
-        # Calculate ROI and CPA
-        campaign_data['roi'] = (campaign_data['conversion_value'] - campaign_data['cost']) / campaign_data['cost'] * 100
-        campaign_data['cpa'] = campaign_data.apply(lambda x: x['cost'] / x['conversions'] if x['conversions'] > 0 else 0, axis=1)
-        
-        # Prepare visualization data
-        visualizations = {
-            'summary': {
-                'total_cost': float(df['cost'].sum()),
-                'total_clicks': int(df['clicks'].sum()),
-                'total_impressions': int(df['impressions'].sum()),
-                'total_conversions': float(df['conversions'].sum()),
-                'avg_ctr': float(df['ctr'].mean() if 'ctr' in df else 0),
-                'avg_conversion_rate': float(df['conversion_rate'].mean() if 'conversion_rate' in df else 0)
-            },
-            'daily_data': daily_data.to_dict(orient='records'),
-            'campaign_data': campaign_data.to_dict(orient='records'),
-            'channel_data': channel_data.to_dict(orient='records'),
-            'raw_data': df.to_dict(orient='records')
+            with span('decode'):
+                buffer.append(decoder.decode(batch))
+        return buffer.to_frame(), batch_count
+    
+    df, batch_count = api_scheduler.call(customer_id, execute)
+    ROWS_TOTAL.inc(len(df), source='api')
+    
+    print(f"Processed {batch_count} batches with {len(df)} total rows")
+    
+    return df
+
+def query_campaign_rows(client, customer_id, start_date, end_date):
+    print(f"Executing Google Ads API query for customer ID: {customer_id}, date range: {start_date} to {end_date}")
+    return run_query(client, customer_id, campaign_query(start_date, end_date))
+
+# Same query as query_campaign_rows, yielding one decoded DataFrame per search_stream batch
+def iter_campaign_batches(client, customer_id, start_date, end_date):
+    print(f"Streaming Google Ads API query for customer ID: {customer_id}, date range: {start_date} to {end_date}")
+    ga_service = client.get_service("GoogleAdsService")
+    query = campaign_query(start_date, end_date)
+    response = api_scheduler.stream(customer_id, lambda: timed_batches(
+        ga_service.search_stream(customer_id=customer_id, query=query)))
+    
+    decoder = BatchDecoder()
+    for batch in response:
+        with span('decode'):
+            df = pd.DataFrame(decoder.decode(batch), columns=decoder.columns)
+        ROWS_TOTAL.inc(len(df), source='api')
+        yield df
+
+# Concurrent identical queries (same account, dates and GAQL) share one in-flight computation
+def query_key(kind, customer_id, start_date, end_date, *extra):
+    return (kind, customer_id, start_date, end_date, campaign_query(start_date, end_date)) + extra
+
+def coalesced(key, fn):
+    started = time.perf_counter()
+    result, shared = query_flights.do(key, fn)
+    if shared:
+        print(f"Shared in-flight {key[0]} for customer ID {key[1]}: {key[2]} to {key[3]}")
+        record_span('singleflight_wait', time.perf_counter() - started)
+    return result
+
+# Pull only the missing or still-settling days of a date range from the API into the warehouse.
+# One sync per account runs at a time across workers; whoever waited re-checks what is still
+# missing, so a range another worker just stored is not requested again.
+def sync_warehouse(client, customer_id, start_date, end_date):
+    if not warehouse.missing_ranges(customer_id, start_date, end_date):
+        print(f"Warehouse hit for customer ID {customer_id}: {start_date} to {end_date}")
+        return
+    
+    def sync():
+        with query_flights.exclusive(('warehouse_sync', customer_id)):
+            missing = warehouse.missing_ranges(customer_id, start_date, end_date)
+            if missing:
+                print(f"Warehouse sync for customer ID {customer_id}: {len(missing)} range(s) to fetch: {missing}")
+            for range_start, range_end in missing:
+                df = query_campaign_rows(client, customer_id, range_start, range_end)
+                warehouse.store(customer_id, range_start, range_end, df)
+    
+    coalesced(query_key('warehouse_sync', customer_id, start_date, end_date), sync)
+
+# Serve a date range from the local warehouse after syncing it
+def sync_campaign_rows(client, customer_id, start_date, end_date):
+    sync_warehouse(client, customer_id, start_date, end_date)
+    with span('warehouse_load'):
+        df = warehouse.load(customer_id, start_date, end_date)
+    ROWS_TOTAL.inc(len(df), source='warehouse')
+    return df
+
+# Strong ETag for a query: account(s), request parameters and the warehouse data version.
+# None when nothing real is stored (sample data is never cacheable).
+# params: the validated, normalized query options (not the raw request body), so requests that
+# mean the same query share a tag whatever their ID formatting, key order or omitted defaults
+def campaign_etag(customer_ids, start_date, end_date, params):
+    versions = [warehouse.data_version(customer_id, start_date, end_date) for customer_id in customer_ids]
+    if not any(versions):
+        return None
+    layout = request.args.get('layout', 'records')
+    key = json.dumps({
+        'payload_version': PAYLOAD_VERSION,
+        'customer_ids': customer_ids,
+        'start_date': start_date,
+        'end_date': end_date,
+        'params': params,
+        'layout': layout if layout in LAYOUTS else 'records',
+        'versions': versions
+    }, sort_keys=True)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+# Frames of recent queries, kept so /raw_data can page through them without re-querying
+def cache_query_frame(customer_ids, start_date, end_date, df):
+    frame_cache.set((tuple(customer_ids), start_date, end_date), df)
+
+def get_query_frame(customer_ids, start_date, end_date):
+    df = frame_cache.get((tuple(customer_ids), start_date, end_date))
+    if df is not None:
+        return df
+    
+    # Another worker may have served the query; rebuild it from the warehouse without calling the API
+    frames = [warehouse.load(customer_id, start_date, end_date) for customer_id in customer_ids]
+    frames = [frame.assign(customer_id=customer_id) if len(customer_ids) > 1 else frame
+              for customer_id, frame in zip(customer_ids, frames) if not frame.empty]
+    if not frames:
+        return None
+    df = pd.concat(frames, ignore_index=True)
+    cache_query_frame(customer_ids, start_date, end_date, df)
+    return df
+
+# Campaign IDs behind campaign names (the dashboard's charts are keyed by name), looked up in
+# the query's cached rows; raises ValueError for names the query did not return
+def campaign_ids_for(customer_id, start_date, end_date, campaign_names):
+    if isinstance(campaign_names, str):
+        campaign_names = [campaign_names]
+    df = get_query_frame([customer_id], start_date, end_date)
+    if df is None or 'campaign_id' not in df:
+        raise ValueError("No campaign data for this query, please fetch the data again")
+    ids = df.drop_duplicates('campaign_name').set_index('campaign_name')['campaign_id']
+    unknown = [name for name in campaign_names if name not in ids.index]
+    if unknown:
+        raise ValueError(f"Unknown campaigns: {', '.join(map(str, unknown))}")
+    return [str(ids[name]) for name in campaign_names]
+
+# Next level below the given campaigns, cached per (credential, account, level, range, campaign,
+# ad group filter) so each campaign costs one API query however often it is reopened. Campaigns
+# not cached yet are fetched together in one IN (...) query and the rows split per campaign
+# (campaigns without rows are cached empty). Returns (rows, IDs of the campaigns fetched).
+def fetch_drilldown(client, customer_id, level, start_date, end_date, campaign_ids, ad_group_ids=(),
+                    credentials=None):
+    credential = credential_key(credentials) if credentials else None
+    
+    def cache_key(campaign_id):
+        return (credential, customer_id, level, start_date, end_date, campaign_id, ad_group_ids)
+    
+    frames = {campaign_id: drilldown_cache.get(cache_key(campaign_id)) for campaign_id in campaign_ids}
+    missing = tuple(campaign_id for campaign_id, frame in frames.items() if frame is None)
+    
+    def fetch():
+        fields, query = plan_drilldown_query(level, start_date, end_date, missing, ad_group_ids)
+        df = run_query(client, customer_id, query, fields)
+        groups = df.groupby('campaign_id').indices
+        fetched = {}
+        for campaign_id in missing:
+            fetched[campaign_id] = df.iloc[groups.get(int(campaign_id), [])].reset_index(drop=True)
+            drilldown_cache.set(cache_key(campaign_id), fetched[campaign_id])
+        return fetched
+    
+    if missing:
+        frames.update(coalesced(('drilldown', customer_id, start_date, end_date, level, missing, ad_group_ids,
+                                 credential), fetch))
+    return pd.concat(list(frames.values()), ignore_index=True), missing
+
+# Comparison period for a date range; raises ValueError for unknown modes or overlapping periods
+def comparison_period(start_date, end_date, mode):
+    if mode not in COMPARE_MODES:
+        raise ValueError(f"Unknown compare mode: {mode} (expected one of {', '.join(COMPARE_MODES)})")
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    if end < start:
+        raise ValueError("end_date is before start_date")
+    shift = timedelta(days=(end - start).days + 1) if mode == 'previous_period' else timedelta(weeks=52)
+    if end - shift >= start:
+        raise ValueError(f"Date range is too long to compare with the {mode.replace('_', ' ')}")
+    return ((start - shift).strftime('%Y-%m-%d'), (end - shift).strftime('%Y-%m-%d'))
+
+# Warehouse ranges a query reads: the date range, plus the comparison period merged into it when adjacent
+def query_ranges(start_date, end_date, previous=None):
+    if previous is None:
+        return [(start_date, end_date)]
+    return contiguous_ranges(date_range(*previous) + date_range(start_date, end_date))
+
+# Dashboard payload for a frame of the date range or, when comparing, of both periods: the usual
+# visualizations for the current period plus a 'comparison' block aggregated from all rows in
+# one pass. Returns (current period rows, visualizations).
+# Status / channel filters apply to the aggregates only; the returned rows stay unfiltered.
+def campaign_visualizations(df, start_date, end_date, previous=None, series=None, panels=PANELS, filters=None):
+    if previous is None:
+        return df, build_visualizations(filter_campaign_rows(df, filters), series, panels)
+    
+    dates = df['date']
+    current = df[(dates >= start_date) & (dates <= end_date)].reset_index(drop=True)
+    visualizations = build_visualizations(filter_campaign_rows(current, filters), series, panels)
+    with span('compare'):
+        comparison = PeriodComparison(filter_campaign_rows(df, filters), (start_date, end_date), previous)
+        resolution, max_points = series or DEFAULT_SERIES
+        daily_data, daily_resolution = downsample_comparison(comparison.daily(), resolution, max_points,
+                                                             lttb_metric=Config.DAILY_LTTB_METRIC)
+        visualizations['comparison'] = {
+            'current_period': {'start_date': start_date, 'end_date': end_date},
+            'previous_period': {'start_date': previous[0], 'end_date': previous[1]},
+            'summary': comparison.summary(),
+            'daily_data': daily_data,
+            'daily_resolution': daily_resolution,
+            'campaign_data': comparison.rollup('campaign_name', **CAMPAIGN_ROLLUP)
         }
+    return current, visualizations
+
+# daily_data resolution and point budget from a request body; raises ValueError when invalid
+def series_options(data):
+    resolution = data.get('resolution') or DEFAULT_SERIES[0]
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution} (expected one of {', '.join(RESOLUTIONS)})")
+    try:
+        max_points = int(data.get('max_points') or DEFAULT_SERIES[1])
+    except (TypeError, ValueError):
+        raise ValueError("max_points must be an integer")
+    if max_points < 3:
+        raise ValueError("max_points must be at least 3")
+    return (resolution, max_points)
+
+# Per-day roll-up bounded to the requested resolution: (frame, resolution used)
+def daily_series(aggregator, series=None):
+    resolution, max_points = series or DEFAULT_SERIES
+    return downsample_daily(aggregator.rollup('date'), resolution, max_points, lttb_metric=Config.DAILY_LTTB_METRIC)
+
+# Only the requested panels are built (all of them by default)
+def visualizations_from(aggregator, raw_total, series=None, panels=PANELS):
+    # Prepare visualization data
+    visualizations = {}
+    if 'summary' in panels:
+        visualizations['summary'] = aggregator.summary()
+    if 'daily' in panels:
+        visualizations['daily_data'], visualizations['daily_resolution'] = daily_series(aggregator, series)
+    if 'campaign' in panels:
+        visualizations['campaign_data'] = aggregator.rollup('campaign_name', **CAMPAIGN_ROLLUP)
+    if 'channel' in panels:
+        visualizations['channel_data'] = aggregator.rollup('channel_type', label='channel_name')
+    if 'status' in panels:
+        visualizations['status_data'] = aggregator.rollup('status')
+    if 'raw' in panels:
+        # Raw rows are paged separately through /raw_data
+        visualizations['raw_total'] = raw_total
+    
+    return visualizations
+
+def build_visualizations(df, series=None, panels=PANELS):
+    # Aggregate data for different visualizations in one pass over the metric columns
+    with span('aggregate'):
+        return visualizations_from(Aggregator(df), len(df), series, panels)
+
+# Streaming counterpart of fetch_campaign_data: yields NDJSON messages while stored chunks and
+# API batches are folded into an IncrementalAggregator, so no full row list is ever held.
+#   start    -> which ranges come from the warehouse and which from the API
+#   progress -> running summary and daily series (at most every STREAM_PROGRESS_SECONDS)
+#   result   -> the same payload /fetch_data returns
+def stream_campaign_data(client, customer_id, start_date, end_date, series=None):
+    aggregator = IncrementalAggregator(DASHBOARD_DIMENSIONS)
+    
+    missing = warehouse.missing_ranges(customer_id, start_date, end_date)
+    missing_dates = {date for range_start, range_end in missing for date in date_range(range_start, range_end)}
+    stored = contiguous_ranges([date for date in date_range(start_date, end_date) if date not in missing_dates])
+    
+    yield {'type': 'start', 'customer_id': customer_id, 'start_date': start_date, 'end_date': end_date,
+           'cached_ranges': stored, 'fetch_ranges': missing}
+    
+    last_progress = None
+    
+    def progress_due():
+        nonlocal last_progress
+        now = time.monotonic()
+        if last_progress is None or now - last_progress >= Config.STREAM_PROGRESS_SECONDS:
+            last_progress = now
+            return True
+        return False
+    
+    def progress():
+        daily_data, daily_resolution = daily_series(aggregator, series)
+        return {'type': 'progress', 'rows': aggregator.rows, 'summary': aggregator.summary(),
+                'daily_data': daily_data, 'daily_resolution': daily_resolution}
+    
+    for range_start, range_end in stored:
+        for chunk in warehouse.iter_load(customer_id, range_start, range_end, chunksize=Config.STREAM_CHUNK_ROWS):
+            ROWS_TOTAL.inc(len(chunk), source='warehouse')
+            with span('aggregate'):
+                aggregator.add(chunk)
+            if progress_due():
+                yield progress()
+    
+    if missing:
+        # One sync per account at a time, as in sync_warehouse, held from begin_range to finish_range
+        # so no other sync deletes or appends rows in between. Days another worker stored while this
+        # one waited for the lock are read back instead of fetched again. The sync runs on its own
+        # thread and hands progress back through a queue, so the lock is never held while this
+        # generator waits on a slow client (and a client that goes away does not cut a range short).
+        messages = queue.Queue()
         
-        return visualizations
+        def sync():
+            try:
+                with query_flights.exclusive(('warehouse_sync', customer_id)):
+                    now_missing = warehouse.missing_ranges(customer_id, start_date, end_date)
+                    still_missing = {date for range_start, range_end in now_missing
+                                     for date in date_range(range_start, range_end)} & missing_dates
+                    synced = contiguous_ranges(sorted(missing_dates - still_missing))
+                    for range_start, range_end in synced:
+                        for chunk in warehouse.iter_load(customer_id, range_start, range_end,
+                                                         chunksize=Config.STREAM_CHUNK_ROWS):
+                            ROWS_TOTAL.inc(len(chunk), source='warehouse')
+                            with span('aggregate'):
+                                aggregator.add(chunk)
+                    
+                    for range_start, range_end in contiguous_ranges(sorted(still_missing)):
+                        warehouse.begin_range(customer_id, range_start, range_end)
+                        for df in iter_campaign_batches(client, customer_id, range_start, range_end):
+                            warehouse.append_rows(customer_id, df)
+                            with span('aggregate'):
+                                aggregator.add(df)
+                            if progress_due():
+                                messages.put(progress())
+                        warehouse.finish_range(customer_id, range_start, range_end)
+                messages.put(None)
+            except Exception as e:
+                messages.put(e)
+        
+        threading.Thread(target=contextvars.copy_context().run, args=(sync,), name='stream-sync', daemon=True).start()
+        while True:
+            message = messages.get()
+            if message is None:
+                break
+            if isinstance(message, Exception):
+                raise message
+            yield message
+    
+    # If no data was returned, create sample data for demonstration
+    if aggregator.rows == 0:
+        print("No data returned from Google Ads API. Creating sample data for demonstration.")
+        df = sample_frame(start_date, end_date)
+        cache_query_frame([customer_id], start_date, end_date, df)
+        yield dict(type='result', **mark_degraded(build_visualizations(df, series), 'sample', NO_DATA_REASON))
+        return
     
-    except GoogleAdsException as ex:
+    yield dict(type='result', **visualizations_from(aggregator, aggregator.rows, series))
+
+# A panel subset without raw rows or a comparison, for a range the warehouse does not hold yet,
+# is answered by a projected API query (see gaql.plan_campaign_query) instead of a full sync
+def projected_query(customer_id, start_date, end_date, previous, panels):
+    return previous is None and 'raw' not in panels and bool(warehouse.missing_ranges(customer_id, start_date, end_date))
+
+# previous: optional (start_date, end_date) of a comparison period (see comparison_period)
+# series: optional daily_data (resolution, max_points) (see series_options)
+# panels / filters: payload parts to build and status / channel filters (see gaql)
+def fetch_campaign_data(client, customer_id, start_date, end_date, previous=None, series=None,
+                        panels=PANELS, filters=None, credentials=None):
+    try:
+        def compute():
+            if projected_query(customer_id, start_date, end_date, previous, panels):
+                fields, query = plan_campaign_query(start_date, end_date, panels, filters)
+                print(f"Projected query for customer ID {customer_id} (panels: {', '.join(panels)})")
+                df = run_query(client, customer_id, query, fields)
+                if df.empty:
+                    print("No data returned from Google Ads API. Creating sample data for demonstration.")
+                    df = filter_campaign_rows(sample_frame(start_date, end_date), filters)
+                    return mark_degraded(build_visualizations(df, series, panels), 'sample', NO_DATA_REASON)
+                return build_visualizations(df, series, panels)
+            
+            # Both periods come out of the warehouse together (one range when they are adjacent)
+            frames = [sync_campaign_rows(client, customer_id, range_start, range_end)
+                      for range_start, range_end in query_ranges(start_date, end_date, previous)]
+            df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            
+            # If no data was returned, create sample data for demonstration
+            sample = df.empty
+            if sample:
+                print("No data returned from Google Ads API. Creating sample data for demonstration.")
+                # Generate sample data for demonstration purposes
+                df = sample_frame(previous[0] if previous else start_date, end_date)
+            
+            # Process data for visualization
+            df, visualizations = campaign_visualizations(df, start_date, end_date, previous, series, panels, filters)
+            cache_query_frame([customer_id], start_date, end_date, df)
+            return mark_degraded(visualizations, 'sample', NO_DATA_REASON) if sample else visualizations
+        
+        # Callers of the same credential that arrive while the same query is in flight get the same
+        # payload; the projected path runs on the leader's client, so flights are never shared
+        # across credentials
+        key = query_key('campaign_data', customer_id, start_date, end_date, previous, series, panels,
+                        tuple(sorted((filters or {}).items())), credential_key(credentials) if credentials else None)
+        return coalesced(key, compute)
+    
+    except google_ads_errors.GoogleAdsException as ex:
+        # Logged and re-raised as is: transient codes were already retried by the scheduler,
+        # and callers need the original error (ApiUnavailableError passes through untouched)
         print(f"Google Ads API Error: {ex.error.code().name} - {ex.error.message}")
         for error in ex.failure.errors:
             print(f"Error details: {error.message}")
-        raise Exception(f"Google Ads API Error: {ex.error.code().name} - {ex.error.message}")
-    except Exception as e:
-        print(f"Unexpected error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise Exception(f"Error processing data: {str(e)}")
+        raise
 
-# Generate sample data for demonstration when no real data is available
-def generate_sample_data(start_date, end_date):
-    start = datetime.strptime(start_date, '%Y-%m-%d')
-    end = datetime.strptime(end_date, '%Y-%m-%d')
-    date_range = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
-    
-    campaigns = [
-        {'id': '1234567890', 'name': 'Search Campaign', 'status': 'ENABLED', 'type': 'SEARCH'},
-        {'id': '2345678901', 'name': 'Display Campaign', 'status': 'ENABLED', 'type': 'DISPLAY'},
-        {'id': '3456789012', 'name': 'Video Campaign', 'status': 'ENABLED', 'type': 'VIDEO'},
-        {'id': '4567890123', 'name': 'Shopping Campaign', 'status': 'PAUSED', 'type': 'SHOPPING'}
-    ]
-    
-    data = []
-    for date in date_range:
-        for campaign in campaigns:
-            impressions = int(random.randint(500, 10000))
-            clicks = int(random.randint(10, impressions//10))
-            cost = round(random.uniform(10, 500), 2)
-            conversions = round(random.uniform(0, clicks//10), 2)
-            
-            data.append({
-                'campaign_id': campaign['id'],
-                'campaign_name': campaign['name'],
-                'status': campaign['status'],
-                'channel_type': campaign['type'],
-                'date': date,
-                'impressions': impressions,
-                'clicks': clicks,
-                'ctr': round(clicks / impressions * 100, 2) if impressions > 0 else 0,
-                'avg_cpc': round(cost / clicks, 2) if clicks > 0 else 0,
-                'conversions': conversions,
-                'conversion_value': round(conversions * random.uniform(50, 200), 2),
-                'cost': cost,
-                'conversion_rate': round(conversions / clicks * 100, 2) if clicks > 0 else 0,
-                'interaction_rate': round(random.uniform(1, 10), 2),
-                'video_views': int(random.randint(0, 1000)) if campaign['type'] == 'VIDEO' else 0,
-                'view_through_conversions': round(random.uniform(0, 5), 2)
-            })
-    
-    return data
+# Rows stored in the warehouse for a query the API could not refresh, built into the usual
+# payload and flagged degraded with the days that are missing or stale. None when nothing is stored.
+def stored_campaign_data(customer_id, start_date, end_date, previous, series, panels, filters, error):
+    ranges = query_ranges(start_date, end_date, previous)
+    frames = [warehouse.load(customer_id, range_start, range_end) for range_start, range_end in ranges]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return None
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    stale = [missing for range_start, range_end in ranges
+             for missing in warehouse.missing_ranges(customer_id, range_start, range_end)]
+    df, visualizations = campaign_visualizations(df, start_date, end_date, previous, series, panels, filters)
+    cache_query_frame([customer_id], start_date, end_date, df)
+    print(f"Serving stored rows for customer ID {customer_id}; missing or stale: {stale}")
+    return mark_degraded(visualizations, 'warehouse', str(error), stale_ranges=stale, retry_after=error.retry_after)
+
+# Demo rows for the sample-data fallback (sized and seeded from Config)
+def sample_frame(start_date, end_date):
+    return pd.DataFrame(generate_sample_data(
+        start_date,
+        end_date,
+        campaigns=Config.SAMPLE_CAMPAIGNS,
+        channel_mix=SAMPLE_CHANNEL_MIX,
+        seed=Config.SAMPLE_SEED
+    ))
 
 if __name__ == '__main__':
     app.run(debug=Config.DEBUG)
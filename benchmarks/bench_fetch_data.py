@@ -0,0 +1,173 @@
+"""End-to-end /fetch_data throughput against a fake GoogleAdsService.
+
+Drives the real Flask route through the test client, with the Google Ads client
+replaced by benchmarks/fake_google_ads.py, so the whole path (warehouse sync,
+stream decode, aggregation, serialization, compression) runs offline:
+
+  cold  each request starts from an empty warehouse, so every row comes through
+        search_stream (what a first dashboard load costs)
+  warm  the warehouse already holds the range (what a repeat load costs)
+
+Reports rows/sec, p50/p99 latency, the Server-Timing phase breakdown of the last
+request and, in a separate traced run, peak Python memory (tracemalloc). Exits
+non-zero when a --max-* / --min-* threshold is missed, so CI can guard regressions.
+
+Usage:
+    python benchmarks/bench_fetch_data.py [--campaigns 1000] [--days 365] [--repeat 5]
+        [--mode both] [--max-p99-ms N] [--min-rows-per-sec N] [--max-peak-mb N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORK_DIR = tempfile.mkdtemp(prefix='grow_ads_bench_')
+
+# Configure the app for an offline run before it is imported
+os.environ.update({
+    'GOOGLE_ADS_DEVELOPER_TOKEN': 'benchmark',
+    'GOOGLE_ADS_CLIENT_ID': 'benchmark',
+    'GOOGLE_ADS_CLIENT_SECRET': 'benchmark',
+    'WAREHOUSE_PATH': os.path.join(WORK_DIR, 'warehouse.sqlite3'),
+    'PREFETCH_ENABLED': 'false'
+})
+
+import app as app_module  # noqa: E402
+from fake_google_ads import FakeGoogleAdsClient, FakeGoogleAdsService  # noqa: E402
+from warehouse import MetricsWarehouse  # noqa: E402
+
+CUSTOMER_ID = '1234567890'
+
+
+def install_fake(service):
+    app_module.client_registry.factory = lambda refresh_token, login_customer_id: FakeGoogleAdsClient(service)
+    app_module.client_registry.clear()
+
+
+def reset_warehouse(run):
+    # A fresh file per cold run; the old one is dropped with WORK_DIR at the end
+    app_module.warehouse = MetricsWarehouse(
+        os.path.join(WORK_DIR, f'warehouse-{run}.sqlite3'),
+        settling_days=app_module.Config.WAREHOUSE_SETTLING_DAYS,
+        refresh_seconds=app_module.Config.WAREHOUSE_REFRESH_SECONDS
+    )
+
+
+def request_once(client, start_date, end_date, expected_rows):
+    app_module.frame_cache.clear()
+    # app.py logs every query and batch count with print; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        response = client.post('/fetch_data', json={
+            'customer_id': CUSTOMER_ID, 'start_date': start_date, 'end_date': end_date
+        }, headers={'Accept-Encoding': 'br, gzip'})
+        body = response.get_data()
+        seconds = time.perf_counter() - started
+    if response.status_code != 200:
+        raise SystemExit(f"/fetch_data returned {response.status_code}: {body[:200]!r}")
+    raw_total = app_module.frame_cache.get(((CUSTOMER_ID,), start_date, end_date))
+    if raw_total is None or len(raw_total) != expected_rows:
+        # fetch_data falls back to sample data on errors; never benchmark that by accident
+        raise SystemExit(f"/fetch_data did not serve the fake rows (expected {expected_rows:,})")
+    return seconds, len(body), response.headers.get('Server-Timing', '')
+
+
+def run_mode(client, mode, args, start_date, end_date, expected_rows):
+    samples = []
+    body_size = 0
+    timing = ''
+    if mode == 'warm':
+        reset_warehouse('warm')
+        request_once(client, start_date, end_date, expected_rows)
+    for run in range(args.repeat):
+        if mode == 'cold':
+            reset_warehouse(f'cold-{run}')
+        seconds, body_size, timing = request_once(client, start_date, end_date, expected_rows)
+        samples.append(seconds)
+
+    # Peak memory in a separate run so tracing overhead does not skew the latencies
+    if mode == 'cold':
+        reset_warehouse('cold-traced')
+    tracemalloc.start()
+    request_once(client, start_date, end_date, expected_rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'p50': float(np.percentile(samples, 50)),
+        'p99': float(np.percentile(samples, 99)),
+        'rows_per_sec': expected_rows / statistics.median(samples),
+        'peak_mb': peak / (1024 * 1024),
+        'body_size': body_size,
+        'timing': timing
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--campaigns', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--first-batch-latency', type=float, default=0.0,
+                        help='simulated server latency before the first batch, in seconds')
+    parser.add_argument('--mode', choices=['cold', 'warm', 'both'], default='both')
+    parser.add_argument('--max-p99-ms', type=float)
+    parser.add_argument('--min-rows-per-sec', type=float)
+    parser.add_argument('--max-peak-mb', type=float)
+    args = parser.parse_args()
+
+    service = FakeGoogleAdsService(args.campaigns, batch_size=args.batch_size,
+                                   first_batch_latency=args.first_batch_latency)
+    install_fake(service)
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['credentials'] = {'refresh_token': 'benchmark'}
+
+    # A fixed window that ended long ago, so nothing is treated as still settling
+    start = date(2024, 1, 1)
+    start_date = start.isoformat()
+    end_date = (start + timedelta(days=args.days - 1)).isoformat()
+    expected_rows = service.rows_for(start_date, end_date)
+
+    modes = ['cold', 'warm'] if args.mode == 'both' else [args.mode]
+    print(f"{expected_rows:,} rows ({args.campaigns} campaigns x {args.days} days), "
+          f"batch size {args.batch_size}, {args.repeat} runs per mode")
+    print(f"{'mode':<6} {'rows/sec':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak MB':>9} {'body bytes':>12}")
+
+    failed = []
+    try:
+        for mode in modes:
+            result = run_mode(client, mode, args, start_date, end_date, expected_rows)
+            print(f"{mode:<6} {result['rows_per_sec']:>12,.0f} {result['p50'] * 1000:>10.1f} "
+                  f"{result['p99'] * 1000:>10.1f} {result['peak_mb']:>9.1f} {result['body_size']:>12,}")
+            print(f"       Server-Timing: {result['timing']}")
+
+            if args.max_p99_ms is not None and result['p99'] * 1000 > args.max_p99_ms:
+                failed.append(f"{mode}: p99 {result['p99'] * 1000:.1f} ms > {args.max_p99_ms} ms")
+            if args.min_rows_per_sec is not None and result['rows_per_sec'] < args.min_rows_per_sec:
+                failed.append(f"{mode}: {result['rows_per_sec']:,.0f} rows/sec < {args.min_rows_per_sec:,.0f}")
+            if args.max_peak_mb is not None and result['peak_mb'] > args.max_peak_mb:
+                failed.append(f"{mode}: peak {result['peak_mb']:.1f} MB > {args.max_peak_mb} MB")
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    if failed:
+        print('Thresholds missed:\n  ' + '\n  '.join(failed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
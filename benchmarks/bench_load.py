@@ -0,0 +1,215 @@
+"""Concurrent-user capacity of /fetch_data under different gunicorn worker setups.
+
+Starts gunicorn with gunicorn.conf.py on benchmarks/load_app.py (the real app,
+Google Ads calls answered by the fake client after --api-latency seconds) and
+drives it with N concurrent users, each logging in once and then posting
+/fetch_data for a fresh customer ID every time, so every request waits on
+search_stream like a cold dashboard load. Compared setups:
+
+  sync     the old `gunicorn wsgi:app` model: one request per worker process
+  gthread  the default in gunicorn.conf.py: --threads requests per worker
+  gevent   cooperative workers with gRPC's gevent integration (if installed)
+
+For every concurrency level it reports throughput and p50/p95 latency; a setup's
+capacity is the most concurrent users it served with p95 under
+--slo-factor x the single-user p50 (i.e. before requests start queueing).
+
+Usage:
+    python benchmarks/bench_load.py [--workers 2] [--threads 8] [--users 1,4,8,16,32]
+        [--requests-per-user 3] [--api-latency 0.5] [--campaigns 20] [--days 30]
+        [--setups sync,gthread,gevent]
+"""
+import argparse
+import http.client
+import importlib.util
+import itertools
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Unique per request across every user and level, so the warehouse never short-circuits the API
+_customer_ids = itertools.count(1000000000)
+_customer_ids_lock = threading.Lock()
+
+
+def next_customer_id():
+    with _customer_ids_lock:
+        return str(next(_customer_ids))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(setup, args, work_dir):
+    port = free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_CONCURRENCY=str(args.workers),
+        # gunicorn silently upgrades sync workers with threads > 1 to gthread
+        GUNICORN_THREADS=str(args.threads if setup == 'gthread' else 1),
+        GUNICORN_WORKER_CLASS=setup,
+        GUNICORN_WORKER_CONNECTIONS=str(max(args.users)),
+        LOAD_WORK_DIR=work_dir,
+        LOAD_CAMPAIGNS=str(args.campaigns),
+        LOAD_API_LATENCY=str(args.api_latency),
+        # Every customer ID next_customer_id() can hand out, across setups, warm-up and levels
+        LOAD_CUSTOMER_COUNT=str(len(args.setups.split(',')) * (args.workers + sum(args.users) * args.requests_per_user))
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+         '--chdir', os.path.join(ROOT, 'benchmarks'), 'load_app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"gunicorn ({setup}) exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/_bench/login')
+            conn.getresponse().read()
+            conn.close()
+            return process, port
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise SystemExit(f"gunicorn ({setup}) did not start listening on port {port}")
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def login(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    conn.request('GET', '/_bench/login')
+    response = conn.getresponse()
+    response.read()
+    cookie = response.getheader('Set-Cookie').split(';', 1)[0]
+    conn.close()
+    return cookie
+
+
+def user(port, cookie, count, start_date, end_date, latencies, errors):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+    for _ in range(count):
+        body = json.dumps({'customer_id': next_customer_id(), 'start_date': start_date, 'end_date': end_date})
+        started = time.perf_counter()
+        try:
+            conn.request('POST', '/fetch_data', body=body,
+                         headers={'Content-Type': 'application/json', 'Cookie': cookie})
+            response = conn.getresponse()
+            response.read()
+        except OSError as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+            continue
+        if response.status != 200:
+            errors.append(f"HTTP {response.status}")
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+
+
+def run_level(port, users, args, start_date, end_date):
+    cookies = [login(port) for _ in range(users)]
+    latencies = []
+    errors = []
+    threads = [threading.Thread(target=user, args=(port, cookie, args.requests_per_user,
+                                                   start_date, end_date, latencies, errors))
+               for cookie in cookies]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'users': users,
+        'throughput': len(latencies) / elapsed,
+        'p50': float(np.percentile(latencies, 50)) if latencies else float('nan'),
+        'p95': float(np.percentile(latencies, 95)) if latencies else float('nan'),
+        'errors': len(errors)
+    }
+
+
+def run_setup(setup, args, start_date, end_date):
+    work_dir = tempfile.mkdtemp(prefix=f'grow_ads_load_{setup}_')
+    process, port = start_server(setup, args, work_dir)
+    try:
+        # One untimed request per worker so imports and the client pool are warm
+        run_level(port, args.workers, argparse.Namespace(requests_per_user=1), start_date, end_date)
+        return [run_level(port, users, args, start_date, end_date) for users in args.users]
+    finally:
+        stop_server(process)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--users', default='1,4,8,16,32')
+    parser.add_argument('--requests-per-user', type=int, default=3)
+    parser.add_argument('--api-latency', type=float, default=0.5,
+                        help='simulated search_stream server time per request, in seconds')
+    parser.add_argument('--campaigns', type=int, default=20)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--slo-factor', type=float, default=2.0)
+    parser.add_argument('--setups', default='sync,gthread,gevent')
+    args = parser.parse_args()
+    args.users = [int(users) for users in args.users.split(',')]
+
+    setups = args.setups.split(',')
+    if 'gevent' in setups and importlib.util.find_spec('gevent') is None:
+        print("gevent is not installed; skipping the gevent setup")
+        setups.remove('gevent')
+
+    # A fixed window that ended long ago, so nothing is treated as still settling
+    start = date(2024, 1, 1)
+    start_date = start.isoformat()
+    end_date = (start + timedelta(days=args.days - 1)).isoformat()
+
+    print(f"{args.workers} workers, {args.threads} threads per gthread worker, "
+          f"{args.api_latency * 1000:.0f} ms API latency, {args.campaigns * args.days:,} rows per request")
+    print(f"{'setup':<8} {'users':>6} {'req/sec':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+
+    capacities = {}
+    for setup in setups:
+        results = run_setup(setup, args, start_date, end_date)
+        baseline = results[0]['p50']
+        capacities[setup] = 0
+        for result in results:
+            print(f"{setup:<8} {result['users']:>6} {result['throughput']:>9.1f} {result['p50'] * 1000:>9.0f} "
+                  f"{result['p95'] * 1000:>9.0f} {result['errors']:>7}")
+            if not result['errors'] and result['p95'] <= baseline * args.slo_factor:
+                capacities[setup] = max(capacities[setup], result['users'])
+
+    print(f"Capacity (most concurrent users with p95 <= {args.slo_factor:g}x single-user p50):")
+    for setup, users in capacities.items():
+        print(f"  {setup:<8} {users} users")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Compare dashboard payload encoding paths.
+
+Measures payload bytes and encode time for the previous path (DataFrame.to_dict
+records + Flask's stdlib JSON provider) against serialization.encode_payload with
+each available encoder and layout.
+
+Usage:
+    python benchmarks/bench_serialization.py [--campaigns 500] [--days 365] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, build_visualizations  # noqa: E402
+from sample_data import generate_sample_data  # noqa: E402
+from serialization import encode_payload, orjson  # noqa: E402
+
+
+def make_rows(campaigns, days, seed=0):
+    end_date = (date(2025, 1, 1) + timedelta(days=days - 1)).isoformat()
+    return pd.DataFrame(generate_sample_data('2025-01-01', end_date, campaigns=campaigns, seed=seed))
+
+
+def timed(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--campaigns', type=int, default=500)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_rows(args.campaigns, args.days)
+    payload = build_visualizations(df)
+    # Include the full row table, as the dashboard payload used to
+    payload['raw_data'] = df
+
+    def previous_path():
+        records = {k: v.to_dict(orient='records') if isinstance(v, pd.DataFrame) else v for k, v in payload.items()}
+        with app.app_context():
+            return app.json.dumps(records).encode('utf-8')
+
+    paths = [('to_dict + flask json (previous)', previous_path)]
+    encoders = ['json'] + (['orjson'] if orjson is not None else [])
+    for encoder in encoders:
+        for layout in ('records', 'columns'):
+            paths.append((f'encode_payload {encoder}/{layout}',
+                          lambda encoder=encoder, layout=layout: encode_payload(payload, layout=layout, encoder=encoder)))
+
+    print(f"{len(df):,} rows ({args.campaigns} campaigns x {args.days} days), median of {args.repeat} runs")
+    print(f"{'path':<36} {'bytes':>14} {'encode ms':>10}")
+    baseline = None
+    for name, fn in paths:
+        body, seconds = timed(fn, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:<36} {len(body):>14,} {seconds * 1000:>10.1f}  ({baseline / seconds:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
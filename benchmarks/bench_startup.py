@@ -0,0 +1,81 @@
+"""Measure worker startup cost of importing app.py.
+
+Each run imports app in a fresh interpreter (as a gunicorn worker or a cold start
+would) and reports the import time, the resident memory afterwards and which heavy
+dependencies were loaded. With --first-request the dashboard's /fetch_data path is
+also exercised (sample data, no Google Ads credentials needed) to show the cost
+that lazy loading defers to the first request.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--first-request]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['pandas', 'numpy', 'plotly', 'google.ads.googleads.client', 'grpc', 'google_auth_oauthlib.flow']
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter() - started
+
+def rss_mb():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+result = {'import_seconds': imported, 'rss_mb': rss_mb(),
+          'loaded': [name for name in HEAVY_MODULES if name in sys.modules]}
+
+if FIRST_REQUEST:
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session['credentials'] = {'refresh_token': 'benchmark'}
+    started = time.perf_counter()
+    client.post('/fetch_data', json={'customer_id': '1234567890',
+                                     'start_date': '2025-01-01', 'end_date': '2025-01-31'})
+    result['first_request_seconds'] = time.perf_counter() - started
+    result['first_request_rss_mb'] = rss_mb()
+
+print(json.dumps(result))
+"""
+
+
+def run_probe(first_request):
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\nFIRST_REQUEST = {first_request!r}\n" + PROBE
+    env = dict(os.environ, PREFETCH_ENABLED='false')
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    # app prints while importing; the result is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--first-request', action='store_true')
+    args = parser.parse_args()
+
+    results = [run_probe(args.first_request) for _ in range(args.runs)]
+
+    print(f"python {sys.version.split()[0]}, {args.runs} fresh interpreters")
+    print(f"{'import app':<24}{statistics.median(r['import_seconds'] for r in results) * 1000:>10.1f} ms (median)")
+    print(f"{'RSS after import':<24}{statistics.median(r['rss_mb'] for r in results):>10.1f} MB (median)")
+    if args.first_request:
+        print(f"{'first /fetch_data':<24}{statistics.median(r['first_request_seconds'] for r in results) * 1000:>10.1f} ms (median)")
+        print(f"{'RSS after request':<24}{statistics.median(r['first_request_rss_mb'] for r in results):>10.1f} MB (median)")
+    print(f"{'heavy modules loaded':<24}{', '.join(results[0]['loaded']) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""Offline stand-in for GoogleAdsService.search_stream.
+
+FakeGoogleAdsClient / FakeGoogleAdsService answer the campaign and customer_client
+queries app.py sends with real GoogleAdsRow protobuf batches (the installed
+google-ads library's default API version), so the whole decode path runs exactly
+as it would against the API, with no network access or credentials.
+
+Rows are assembled from pre-serialized pieces: protobuf merges concatenated
+messages, so campaign, segments and metrics fragments are joined per row and
+every batch is parsed from bytes when it is yielded, like a gRPC stream. That
+keeps memory flat (one batch at a time) even for 10k campaigns x 365 days.
+
+Like the API, campaign.status / advertising_channel_type IN (...) filters drop
+campaigns, and a query without segments.date in its SELECT returns one row per
+campaign for the whole range.
+
+Drill-down queries (FROM ad_group / keyword_view / search_term_view with a
+campaign.id IN (...) filter) return range totals for AD_GROUPS_PER_CAMPAIGN ad
+groups per campaign and ROWS_PER_AD_GROUP keywords or search terms per ad group.
+
+list_accessible_customers returns accessible_customers; a customer_client query
+on one of manager_clients' keys returns the manager and its clients.
+"""
+import importlib
+import re
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from google.ads.googleads.client import _DEFAULT_VERSION
+
+API_VERSION = _DEFAULT_VERSION
+
+_service_types = importlib.import_module(f'google.ads.googleads.{API_VERSION}.services.types.google_ads_service')
+GoogleAdsRow = _service_types.GoogleAdsRow
+SearchGoogleAdsStreamResponse = _service_types.SearchGoogleAdsStreamResponse
+
+STATUSES = ['ENABLED', 'ENABLED', 'ENABLED', 'PAUSED']
+CHANNELS = ['SEARCH', 'DISPLAY', 'VIDEO', 'SHOPPING', 'PERFORMANCE_MAX']
+
+# Distinct metric fragments rows are drawn from; enough variety for realistic aggregates
+METRIC_POOL_SIZE = 4096
+
+# The API returns up to 10,000 rows per search_stream batch
+DEFAULT_BATCH_SIZE = 10000
+
+_DATE_RANGE = re.compile(r"BETWEEN '(\d{4}-\d{2}-\d{2})' AND '(\d{4}-\d{2}-\d{2})'")
+_ID_FILTER = re.compile(r"(campaign|ad_group)\.id IN \(([^)]*)\)")
+_RESOURCE = re.compile(r" FROM (\w+)")
+
+# Drill-down entities below each campaign
+AD_GROUPS_PER_CAMPAIGN = 4
+ROWS_PER_AD_GROUP = 6
+MATCH_TYPES = ['EXACT', 'PHRASE', 'BROAD']
+
+_IN_FILTER = re.compile(r"campaign\.(status|advertising_channel_type) IN \(([^)]*)\)")
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def _fragment(**fields):
+    # Serialized GoogleAdsRow with only the given nested fields set, e.g. campaign={'id': 1}
+    row = GoogleAdsRow()
+    for message, values in fields.items():
+        for name, value in values.items():
+            setattr(getattr(row, message), name, value)
+    return GoogleAdsRow.serialize(row)
+
+
+class FakeGoogleAdsService:
+    def __init__(self, campaigns=1000, batch_size=DEFAULT_BATCH_SIZE, first_batch_latency=0.0, seed=0,
+                 accessible_customers=('1234567890',), manager_clients=None):
+        self.campaigns = campaigns
+        self.accessible_customers = list(accessible_customers)
+        self.manager_clients = manager_clients or {}
+        self.batch_size = batch_size
+        self.first_batch_latency = first_batch_latency
+        self.calls = []
+        rng = np.random.default_rng(seed)
+
+        self._campaign_attributes = [
+            {'status': STATUSES[i % len(STATUSES)], 'advertising_channel_type': CHANNELS[i % len(CHANNELS)]}
+            for i in range(campaigns)
+        ]
+        self._campaign_fragments = [
+            _fragment(campaign=dict(id=10000000 + i, name=f'Campaign {i:05d}', **attributes))
+            for i, attributes in enumerate(self._campaign_attributes)
+        ]
+
+        impressions = rng.integers(100, 50000, METRIC_POOL_SIZE)
+        clicks = (impressions * rng.uniform(0.005, 0.08, METRIC_POOL_SIZE)).astype(np.int64)
+        cost_micros = (clicks * rng.uniform(0.2, 4.0, METRIC_POOL_SIZE) * 1e6).astype(np.int64)
+        conversions = np.round(clicks * rng.uniform(0, 0.1, METRIC_POOL_SIZE), 2)
+        self._metric_fragments = [
+            _fragment(metrics={
+                'impressions': int(impressions[i]),
+                'clicks': int(clicks[i]),
+                'ctr': float(clicks[i] / impressions[i]),
+                'average_cpc': float(cost_micros[i] / max(clicks[i], 1)),
+                'conversions': float(conversions[i]),
+                'conversions_value': float(round(conversions[i] * rng.uniform(20, 200), 2)),
+                'cost_micros': int(cost_micros[i]),
+                'conversions_from_interactions_rate': float(conversions[i] / max(clicks[i], 1)),
+                'interaction_rate': float(clicks[i] / impressions[i]),
+                'video_views': int(impressions[i] // 10) if i % len(CHANNELS) == 2 else 0,
+                'view_through_conversions': float(rng.integers(0, 5))
+            })
+            for i in range(METRIC_POOL_SIZE)
+        ]
+
+    def rows_for(self, start_date, end_date):
+        days = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1
+        return max(days, 0) * self.campaigns
+
+    def _campaign_indices(self, query):
+        # Campaigns passing the query's `campaign.status IN (...)` / channel filters
+        indices = range(self.campaigns)
+        for field, values in _IN_FILTER.findall(query):
+            allowed = {value.strip().strip("'\"") for value in values.split(',')}
+            indices = [i for i in indices if self._campaign_attributes[i][field] in allowed]
+        return list(indices)
+
+    def _row_bytes(self, start_date, end_date, indices):
+        # (campaign, day) rows ordered by date, as the app's ORDER BY segments.date asks
+        day = date.fromisoformat(start_date)
+        last = date.fromisoformat(end_date)
+        day_index = 0
+        while day <= last:
+            segments = _fragment(segments={'date': day.isoformat()})
+            for i in indices:
+                metrics = self._metric_fragments[(i * 7919 + day_index * 104729) % METRIC_POOL_SIZE]
+                yield self._campaign_fragments[i] + segments + metrics
+            day += timedelta(days=1)
+            day_index += 1
+
+    def _total_row_bytes(self, indices):
+        # Without segments.date in SELECT the API returns one row per campaign for the whole range
+        for i in indices:
+            yield self._campaign_fragments[i] + self._metric_fragments[(i * 7919) % METRIC_POOL_SIZE]
+
+    def _drilldown_row_bytes(self, resource, query):
+        # Range totals per ad group, keyword or search term under the queried campaigns
+        ids = {field: {int(value) for value in values.split(',')} for field, values in _ID_FILTER.findall(query)}
+        for campaign in sorted(ids.get('campaign', ())):
+            i = campaign - 10000000
+            if not 0 <= i < self.campaigns:
+                continue
+            for a in range(AD_GROUPS_PER_CAMPAIGN):
+                ad_group_id = campaign * 100 + a
+                if 'ad_group' in ids and ad_group_id not in ids['ad_group']:
+                    continue
+                parent = _fragment(campaign={'id': campaign},
+                                   ad_group={'id': ad_group_id, 'name': f'Ad group {i:05d}-{a}',
+                                             'status': STATUSES[(i + a) % len(STATUSES)]})
+                children = [b''] if resource == 'ad_group' else range(ROWS_PER_AD_GROUP)
+                for k, child in enumerate(children):
+                    if resource == 'keyword_view':
+                        child = _fragment(ad_group_criterion={
+                            'criterion_id': ad_group_id * 10 + k,
+                            'keyword': {'text': f'keyword {i}-{a}-{k}', 'match_type': MATCH_TYPES[k % len(MATCH_TYPES)]},
+                            'status': 'ENABLED'
+                        })
+                    elif resource == 'search_term_view':
+                        child = _fragment(search_term_view={'search_term': f'search term {i}-{a}-{k}',
+                                                            'status': 'NONE'})
+                    metrics = self._metric_fragments[(i * 7919 + a * 131 + k * 17) % METRIC_POOL_SIZE]
+                    yield parent + child + metrics
+
+    def _batches(self, rows):
+        # Like gRPC, the call returns at once and the server latency is paid on the first batch
+        if self.first_batch_latency:
+            time.sleep(self.first_batch_latency)
+        # SearchGoogleAdsStreamResponse.results is field 1 (length-delimited, tag 0x0A)
+        pending = []
+        for row in rows:
+            pending.append(b'\x0a' + _varint(len(row)) + row)
+            if len(pending) == self.batch_size:
+                yield SearchGoogleAdsStreamResponse.deserialize(b''.join(pending))
+                pending = []
+        if pending:
+            yield SearchGoogleAdsStreamResponse.deserialize(b''.join(pending))
+
+    def _customer_client_rows(self, customer_id):
+        # Level 0 is the account itself; a manager also returns its direct clients
+        clients = self.manager_clients.get(str(customer_id))
+        for account_id in [customer_id] + list(clients or []):
+            yield _fragment(customer_client={
+                'id': int(account_id),
+                'descriptive_name': f'Benchmark account {account_id}',
+                'currency_code': 'USD',
+                'time_zone': 'UTC',
+                'manager': clients is not None and account_id == customer_id
+            })
+
+    def search_stream(self, customer_id=None, query=None, **kwargs):
+        self.calls.append((customer_id, query))
+        if 'FROM customer_client' in query:
+            return self._batches(self._customer_client_rows(customer_id))
+        match = _DATE_RANGE.search(query)
+        if match is None:
+            raise ValueError(f"Fake search_stream only understands date-bounded campaign queries: {query}")
+        resource = _RESOURCE.search(query).group(1)
+        if resource in ('ad_group', 'keyword_view', 'search_term_view'):
+            return self._batches(self._drilldown_row_bytes(resource, query))
+        indices = self._campaign_indices(query)
+        if 'segments.date' not in query.split(' FROM ')[0]:
+            return self._batches(self._total_row_bytes(indices))
+        return self._batches(self._row_bytes(match.group(1), match.group(2), indices))
+
+    def list_accessible_customers(self):
+        resource_names = [f'customers/{customer_id}' for customer_id in self.accessible_customers]
+        return type('ListAccessibleCustomersResponse', (), {'resource_names': resource_names})()
+
+
+class FakeGoogleAdsClient:
+    def __init__(self, service):
+        self.service = service
+
+    def get_service(self, name, version=None):
+        # CustomerService.list_accessible_customers is answered by the same fake
+        if name not in ('GoogleAdsService', 'CustomerService'):
+            raise NotImplementedError(f"Fake client has no {name}")
+        return self.service
@@ -0,0 +1,58 @@
+"""WSGI entry point for bench_load.py: the real app backed by the fake Google Ads client.
+
+Served by gunicorn exactly like wsgi.py, but every Google Ads call goes to
+benchmarks/fake_google_ads.py, with LOAD_API_LATENCY seconds of simulated server
+time before the first batch (the wait that pins a sync worker). /_bench/login
+puts placeholder credentials in the session so load clients can call /fetch_data.
+The credential sees one manager account whose LOAD_CUSTOMER_COUNT clients are the
+customer IDs bench_load.py posts (1000000000 upwards).
+
+Configured through the environment bench_load.py sets:
+    LOAD_WORK_DIR, LOAD_CAMPAIGNS, LOAD_API_LATENCY, LOAD_CUSTOMER_COUNT
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORK_DIR = os.environ['LOAD_WORK_DIR']
+
+os.environ.update({
+    'GOOGLE_ADS_DEVELOPER_TOKEN': 'benchmark',
+    'GOOGLE_ADS_CLIENT_ID': 'benchmark',
+    'GOOGLE_ADS_CLIENT_SECRET': 'benchmark',
+    'WAREHOUSE_PATH': os.path.join(WORK_DIR, 'warehouse.sqlite3'),
+    'SESSION_TYPE': 'sqlite',
+    'SESSION_SQLITE_PATH': os.path.join(WORK_DIR, 'sessions.sqlite3'),
+    'SINGLEFLIGHT_LOCK_DIR': os.path.join(WORK_DIR, 'locks'),
+    'PREFETCH_ENABLED': 'false',
+    # Measure the workers, not the API request budgets
+    'API_DEVELOPER_QPS': '0',
+    'API_CUSTOMER_QPS': '0'
+})
+
+import app as app_module  # noqa: E402
+from fake_google_ads import FakeGoogleAdsClient, FakeGoogleAdsService  # noqa: E402
+from flask import session  # noqa: E402
+
+MANAGER_ID = '9999999999'
+CLIENT_IDS = [str(1000000000 + i) for i in range(int(os.environ.get('LOAD_CUSTOMER_COUNT', 1000)))]
+
+service = FakeGoogleAdsService(
+    int(os.environ.get('LOAD_CAMPAIGNS', 20)),
+    first_batch_latency=float(os.environ.get('LOAD_API_LATENCY', 0.5)),
+    accessible_customers=[MANAGER_ID],
+    manager_clients={MANAGER_ID: CLIENT_IDS}
+)
+app_module.client_registry.factory = lambda refresh_token, login_customer_id: FakeGoogleAdsClient(service)
+app_module.client_registry.clear()
+
+app = app_module.app
+
+
+@app.route('/_bench/login')
+def bench_login():
+    session['credentials'] = {'refresh_token': 'benchmark'}
+    return 'ok'
@@ -0,0 +1,82 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+# Wraps a GoogleAdsClient so every service client, and the gRPC channel it owns, is built once
+# and reused. GoogleAdsClient.get_service opens a fresh channel on every call otherwise.
+class PooledClient:
+    def __init__(self, client):
+        self.client = client
+        self._services = {}
+        self._lock = threading.Lock()
+
+    def get_service(self, name, **kwargs):
+        # Interceptors and async services are not shared between callers
+        if set(kwargs) - {'version'}:
+            return self.client.get_service(name, **kwargs)
+
+        key = (name, kwargs.get('version'))
+        with self._lock:
+            service = self._services.get(key)
+            if service is None:
+                service = self.client.get_service(name, **kwargs)
+                self._services[key] = service
+            return service
+
+    def __getattr__(self, name):
+        # enums, get_type, credentials, ... are served by the wrapped client
+        return getattr(self.client, name)
+
+
+# Bounded LRU of PooledClient instances keyed by refresh token and login_customer_id.
+# Entries expire after ttl_seconds so revoked or rotated credentials are eventually dropped.
+class ClientRegistry:
+    def __init__(self, factory, max_size=32, ttl_seconds=3600):
+        self.factory = factory
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(refresh_token, login_customer_id):
+        # Never keep raw refresh tokens around as dictionary keys
+        token_hash = hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+        return (token_hash, login_customer_id or '')
+
+    def get(self, refresh_token, login_customer_id=None):
+        key = self._key(refresh_token, login_customer_id)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._entries.pop(key, None)
+            self.misses += 1
+
+        # Build outside the lock so a slow client construction does not block other credentials
+        client = PooledClient(self.factory(refresh_token, login_customer_id))
+
+        with self._lock:
+            self._entries[key] = (client, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return client
+
+    def invalidate(self, refresh_token):
+        token_hash = self._key(refresh_token, None)[0]
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == token_hash]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,47 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+# Preferred first when the client accepts several with the same quality
+ENCODINGS = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/html')
+
+
+def compress_body(body, encoding, gzip_level=6, brotli_quality=5):
+    if encoding == 'br':
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+
+# Negotiate a Content-Encoding from Accept-Encoding and compress a finished response in place.
+# Streamed (direct_passthrough) responses and small bodies are left alone.
+def compress_response(response, accept_encodings, min_size=1024, gzip_level=6, brotli_quality=5):
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = accept_encodings.best_match(ENCODINGS)
+    if encoding is None or (response.content_length or 0) < min_size:
+        return response
+
+    response.set_data(compress_body(response.get_data(), encoding, gzip_level, brotli_quality))
+    response.headers['Content-Encoding'] = encoding
+
+    # A strong validator must differ between encoded representations
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+
+def etag_variants(etag):
+    # The identity ETag plus the per-encoding ones compress_response may have sent
+    return [etag] + [f'{etag}-{encoding}' for encoding in ENCODINGS]
@@ -37,6 +37,121 @@ class Config:
     FLASK_ENV = os.environ.get('FLASK_ENV', 'development')
     DEBUG = FLASK_ENV == 'development'
     
+    # Local metrics warehouse (per-campaign daily rows cached between requests)
+    WAREHOUSE_PATH = os.environ.get('WAREHOUSE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'warehouse.sqlite3'))
+    # Days that are still re-fetched because Google Ads keeps adjusting recent metrics
+    WAREHOUSE_SETTLING_DAYS = int(os.environ.get('WAREHOUSE_SETTLING_DAYS', 3))
+    # Minimum age in seconds before a settling day is pulled from the API again. Background prefetch
+    # (PREFETCH_INTERVAL_SECONDS) only keeps settling days warm if it runs at least this often
+    WAREHOUSE_REFRESH_SECONDS = int(os.environ.get('WAREHOUSE_REFRESH_SECONDS', 900))
+    
+    # Set to false to receive raw protobuf messages from the Google Ads client (faster decoding)
+    GOOGLE_ADS_USE_PROTO_PLUS = os.environ.get('GOOGLE_ADS_USE_PROTO_PLUS', 'true').lower() == 'true'
+    
+    # Google Ads client registry (clients are reused across requests per refresh token)
+    CLIENT_CACHE_SIZE = int(os.environ.get('CLIENT_CACHE_SIZE', 32))
+    CLIENT_CACHE_TTL_SECONDS = int(os.environ.get('CLIENT_CACHE_TTL_SECONDS', 3600))
+    
+    # Multi-account (MCC roll-up) fetches
+    MULTI_ACCOUNT_MAX_WORKERS = int(os.environ.get('MULTI_ACCOUNT_MAX_WORKERS', 8))
+    MULTI_ACCOUNT_PER_ACCOUNT_LIMIT = int(os.environ.get('MULTI_ACCOUNT_PER_ACCOUNT_LIMIT', 1))
+    
+    # Raw data table: cached query frames and page sizes for /raw_data
+    FRAME_CACHE_SIZE = int(os.environ.get('FRAME_CACHE_SIZE', 16))
+    FRAME_CACHE_TTL_SECONDS = int(os.environ.get('FRAME_CACHE_TTL_SECONDS', 1800))
+    RAW_PAGE_SIZE = int(os.environ.get('RAW_PAGE_SIZE', 50))
+    RAW_MAX_PAGE_SIZE = int(os.environ.get('RAW_MAX_PAGE_SIZE', 500))
+    
+    # JSON encoder for dashboard payloads: 'auto' (orjson when installed, see requirements-optional.txt),
+    # 'orjson' or 'json'
+    JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto')
+    
+    # Response compression (bodies smaller than COMPRESS_MIN_BYTES are sent as is); Brotli is used when
+    # installed (requirements-optional.txt), gzip otherwise
+    COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
+    
+    # Streaming (NDJSON) mode: rows read from the warehouse per chunk and seconds between progress messages
+    STREAM_CHUNK_ROWS = int(os.environ.get('STREAM_CHUNK_ROWS', 50000))
+    STREAM_PROGRESS_SECONDS = float(os.environ.get('STREAM_PROGRESS_SECONDS', 0.5))
+    
+    # Background prefetch of the default dashboard window for recently opened accounts. The interval
+    # defaults to a minute under WAREHOUSE_REFRESH_SECONDS, so settling days are re-synced before a
+    # dashboard load would find them stale; a longer interval leaves them cold part of the time
+    PREFETCH_ENABLED = os.environ.get('PREFETCH_ENABLED', 'true').lower() == 'true'
+    PREFETCH_INTERVAL_SECONDS = int(os.environ.get('PREFETCH_INTERVAL_SECONDS', max(WAREHOUSE_REFRESH_SECONDS - 60, 60)))
+    PREFETCH_MAX_WORKERS = int(os.environ.get('PREFETCH_MAX_WORKERS', 2))
+    PREFETCH_RECENT_HOURS = int(os.environ.get('PREFETCH_RECENT_HOURS', 72))
+    PREFETCH_MAX_ACCOUNTS = int(os.environ.get('PREFETCH_MAX_ACCOUNTS', 50))
+    PREFETCH_WINDOW_DAYS = int(os.environ.get('PREFETCH_WINDOW_DAYS', 30))
+    
+    # Accessible customer list cache (per credential)
+    CUSTOMER_CACHE_SIZE = int(os.environ.get('CUSTOMER_CACHE_SIZE', 256))
+    CUSTOMER_CACHE_TTL_SECONDS = int(os.environ.get('CUSTOMER_CACHE_TTL_SECONDS', 3600))
+    
+    # Prometheus /metrics endpoint (per worker process), off by default; with a token set, scrapers
+    # must send it as 'Authorization: Bearer <token>'
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    
+    # Sample-data fallback: campaign count, channel weights ('SEARCH=2,VIDEO=1'; empty = even mix) and seed
+    SAMPLE_CAMPAIGNS = int(os.environ.get('SAMPLE_CAMPAIGNS', 4))
+    SAMPLE_CHANNEL_MIX = os.environ.get('SAMPLE_CHANNEL_MIX', '')
+    SAMPLE_SEED = int(os.environ.get('SAMPLE_SEED', 0))
+    
+    # Server-side sessions: 'sqlite' (local file shared by workers), 'filesystem' or 'redis'
+    # ('redis' needs `pip install redis`, which is not in requirements.txt)
+    REDIS_URL = os.environ.get('REDIS_URL', '')
+    SESSION_TYPE = os.environ.get('SESSION_TYPE', 'redis' if REDIS_URL else 'sqlite')
+    # Default paths sit next to the warehouse, whatever directory the server was started from
+    SESSION_SQLITE_PATH = os.environ.get('SESSION_SQLITE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sessions.sqlite3'))
+    SESSION_FILE_DIR = os.environ.get('SESSION_FILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'flask_session'))
+    SESSION_FILE_THRESHOLD = int(os.environ.get('SESSION_FILE_THRESHOLD', 500))
+    SESSION_LIFETIME_DAYS = int(os.environ.get('SESSION_LIFETIME_DAYS', 14))
+    SESSION_CLEANUP_N_REQUESTS = int(os.environ.get('SESSION_CLEANUP_N_REQUESTS', 1000))
+    SESSION_COOKIE_SECURE = FLASK_ENV == 'production'
+    
+    # Refresh cached OAuth access tokens this long before they expire
+    TOKEN_REFRESH_MARGIN_SECONDS = int(os.environ.get('TOKEN_REFRESH_MARGIN_SECONDS', 300))
+    
+    # campaign_data keeps the top N campaigns by this summed metric and folds the rest into
+    # one 'Other' row (0 = every campaign)
+    CAMPAIGN_TOP_N = int(os.environ.get('CAMPAIGN_TOP_N', 25))
+    CAMPAIGN_RANK_METRIC = os.environ.get('CAMPAIGN_RANK_METRIC', 'cost')
+    
+    # daily_data is kept to at most this many points: long ranges are rolled up to weeks or
+    # months (or LTTB-sampled on this metric) unless a request asks for another resolution
+    DAILY_MAX_POINTS = int(os.environ.get('DAILY_MAX_POINTS', 400))
+    DAILY_LTTB_METRIC = os.environ.get('DAILY_LTTB_METRIC', 'cost')
+    
+    # Identical concurrent dashboard queries share one computation; warehouse syncs are also
+    # serialised across workers through lock files here ('' = coalesce within a worker only).
+    # Every worker must resolve the same directory, so the default does not depend on the CWD
+    SINGLEFLIGHT_LOCK_DIR = os.environ.get('SINGLEFLIGHT_LOCK_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'locks'))
+    
+    # Drill-down (ad groups, keywords, search terms) rows cached per campaign, and the most
+    # rows a response returns (highest cost first)
+    DRILLDOWN_CACHE_SIZE = int(os.environ.get('DRILLDOWN_CACHE_SIZE', 512))
+    DRILLDOWN_CACHE_TTL_SECONDS = int(os.environ.get('DRILLDOWN_CACHE_TTL_SECONDS', 900))
+    DRILLDOWN_MAX_ROWS = int(os.environ.get('DRILLDOWN_MAX_ROWS', 500))
+    
+    # Google Ads API scheduler (per worker process): request budgets per developer token and per
+    # customer (requests per second and burst; 0 = unlimited), the longest a call waits for its
+    # budget, retries of transient errors with jittered backoff, and the circuit breaker that
+    # pauses calls after API_BREAKER_FAILURES consecutive transient failures. Retries queue like any
+    # call, so API_RETRY_MAX_SECONDS is capped at API_MAX_QUEUE_SECONDS
+    API_DEVELOPER_QPS = float(os.environ.get('API_DEVELOPER_QPS', 20))
+    API_DEVELOPER_BURST = int(os.environ.get('API_DEVELOPER_BURST', 40))
+    API_CUSTOMER_QPS = float(os.environ.get('API_CUSTOMER_QPS', 5))
+    API_CUSTOMER_BURST = int(os.environ.get('API_CUSTOMER_BURST', 10))
+    API_MAX_QUEUE_SECONDS = float(os.environ.get('API_MAX_QUEUE_SECONDS', 20))
+    API_MAX_RETRIES = int(os.environ.get('API_MAX_RETRIES', 4))
+    API_RETRY_BASE_SECONDS = float(os.environ.get('API_RETRY_BASE_SECONDS', 0.5))
+    API_RETRY_MAX_SECONDS = float(os.environ.get('API_RETRY_MAX_SECONDS', 20))
+    API_BREAKER_FAILURES = int(os.environ.get('API_BREAKER_FAILURES', 5))
+    API_BREAKER_RESET_SECONDS = float(os.environ.get('API_BREAKER_RESET_SECONDS', 30))
+    
     # Hugging Face API key
     HUGGINGFACE_API_KEY = os.environ.get('HUGGINGFACE_API_KEY', "hf_your_api_key_here")  # Replace with your actual Hugging Face API key
 
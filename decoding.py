@@ -0,0 +1,169 @@
+from operator import attrgetter
+from lazy_imports import lazy_import
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# (column, GoogleAdsRow field path, NumPy dtype name). dtype 'enum' columns are decoded to their names.
+CAMPAIGN_FIELDS = [
+    ('campaign_id', 'campaign.id', 'int64'),
+    ('campaign_name', 'campaign.name', 'object'),
+    ('status', 'campaign.status', 'enum'),
+    ('channel_type', 'campaign.advertising_channel_type', 'enum'),
+    ('date', 'segments.date', 'object'),
+    ('impressions', 'metrics.impressions', 'int64'),
+    ('clicks', 'metrics.clicks', 'int64'),
+    ('ctr', 'metrics.ctr', 'float64'),
+    ('avg_cpc', 'metrics.average_cpc', 'float64'),
+    ('conversions', 'metrics.conversions', 'float64'),
+    ('conversion_value', 'metrics.conversions_value', 'float64'),
+    ('cost', 'metrics.cost_micros', 'float64'),
+    ('conversion_rate', 'metrics.conversions_from_interactions_rate', 'float64'),
+    ('interaction_rate', 'metrics.interaction_rate', 'float64'),
+    ('video_views', 'metrics.video_views', 'int64'),
+    ('view_through_conversions', 'metrics.view_through_conversions', 'float64')
+]
+
+# Additive metrics shared by the drill-down levels (no date segment: one row per entity and range)
+DRILLDOWN_METRIC_FIELDS = [
+    ('impressions', 'metrics.impressions', 'int64'),
+    ('clicks', 'metrics.clicks', 'int64'),
+    ('cost', 'metrics.cost_micros', 'float64'),
+    ('conversions', 'metrics.conversions', 'float64'),
+    ('conversion_value', 'metrics.conversions_value', 'float64')
+]
+
+# Drill-down levels below a campaign: the ad_group, keyword_view and search_term_view resources
+AD_GROUP_FIELDS = [
+    ('campaign_id', 'campaign.id', 'int64'),
+    ('ad_group_id', 'ad_group.id', 'int64'),
+    ('ad_group_name', 'ad_group.name', 'object'),
+    ('status', 'ad_group.status', 'enum')
+] + DRILLDOWN_METRIC_FIELDS
+
+KEYWORD_FIELDS = [
+    ('campaign_id', 'campaign.id', 'int64'),
+    ('ad_group_id', 'ad_group.id', 'int64'),
+    ('ad_group_name', 'ad_group.name', 'object'),
+    ('criterion_id', 'ad_group_criterion.criterion_id', 'int64'),
+    ('keyword', 'ad_group_criterion.keyword.text', 'object'),
+    ('match_type', 'ad_group_criterion.keyword.match_type', 'enum'),
+    ('status', 'ad_group_criterion.status', 'enum')
+] + DRILLDOWN_METRIC_FIELDS
+
+SEARCH_TERM_FIELDS = [
+    ('campaign_id', 'campaign.id', 'int64'),
+    ('ad_group_id', 'ad_group.id', 'int64'),
+    ('ad_group_name', 'ad_group.name', 'object'),
+    ('search_term', 'search_term_view.search_term', 'object'),
+    ('status', 'search_term_view.status', 'enum')
+] + DRILLDOWN_METRIC_FIELDS
+
+# Account details returned by the customer_client resource
+CUSTOMER_CLIENT_FIELDS = [
+    ('id', 'customer_client.id', 'int64'),
+    ('descriptive_name', 'customer_client.descriptive_name', 'object'),
+    ('currency_code', 'customer_client.currency_code', 'object'),
+    ('time_zone', 'customer_client.time_zone', 'object'),
+    ('manager', 'customer_client.manager', 'bool')
+]
+
+# Unit conversions applied to whole columns once a batch is decoded
+MICROS_COLUMNS = ['avg_cpc', 'cost']
+PERCENT_COLUMNS = ['ctr', 'conversion_rate', 'interaction_rate']
+
+
+def _raw(message):
+    # proto-plus wrappers expose the underlying protobuf as _pb; raw messages are returned as is
+    return getattr(message, '_pb', message)
+
+
+def _enum_names(message, path):
+    # Map enum numbers to names through the protobuf descriptor (works for every API version)
+    *parents, field = path.split('.')
+    descriptor = message.DESCRIPTOR
+    for parent in parents:
+        descriptor = descriptor.fields_by_name[parent].message_type
+    enum_type = descriptor.fields_by_name[field].enum_type
+    return {value.number: value.name for value in enum_type.values}
+
+
+# Decodes search_stream batches into typed NumPy columns straight from the raw protobuf rows,
+# skipping the per-row dict and the proto-plus attribute wrappers.
+class BatchDecoder:
+    def __init__(self, fields=CAMPAIGN_FIELDS, micros_columns=MICROS_COLUMNS, percent_columns=PERCENT_COLUMNS):
+        self.fields = [(column, path, attrgetter(path), dtype) for column, path, dtype in fields]
+        self.columns = [column for column, _, _ in fields]
+        self.micros_columns = [c for c in micros_columns if c in self.columns]
+        self.percent_columns = [c for c in percent_columns if c in self.columns]
+        self._enum_names = {}
+
+    def dtype(self, column):
+        for name, _, _, dtype in self.fields:
+            if name == column:
+                return 'object' if dtype == 'enum' else dtype
+
+    def _decode_enum(self, column, path, codes, sample_row):
+        names = self._enum_names.get(column)
+        if names is None:
+            names = self._enum_names[column] = _enum_names(sample_row, path)
+        unique, inverse = np.unique(codes, return_inverse=True)
+        labels = np.array([names.get(int(code), 'UNKNOWN') for code in unique], dtype=object)
+        return labels[inverse]
+
+    def decode(self, batch):
+        results = _raw(batch).results
+        n = len(results)
+        columns = {}
+        for column, path, getter, dtype in self.fields:
+            if dtype == 'enum':
+                codes = np.fromiter(map(getter, results), dtype=np.int32, count=n)
+                columns[column] = self._decode_enum(column, path, codes, results[0]) if n else codes.astype(object)
+            else:
+                columns[column] = np.fromiter(map(getter, results), dtype=dtype, count=n)
+
+        for column in self.micros_columns:
+            columns[column] = columns[column] / 1e6
+        for column in self.percent_columns:
+            columns[column] = columns[column] * 100
+        return columns
+
+
+# Preallocated, geometrically grown column buffers that decoded batches are appended into
+class ColumnBuffer:
+    def __init__(self, decoder, capacity=1024):
+        self.decoder = decoder
+        self.size = 0
+        self.arrays = {column: np.empty(capacity, dtype=decoder.dtype(column)) for column in decoder.columns}
+
+    def _reserve(self, extra):
+        capacity = max(len(next(iter(self.arrays.values()))), 1)
+        if self.size + extra <= capacity:
+            return
+        while capacity < self.size + extra:
+            capacity *= 2
+        for column, array in self.arrays.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self.arrays[column] = grown
+
+    def append(self, columns):
+        n = len(next(iter(columns.values())))
+        self._reserve(n)
+        for column, values in columns.items():
+            self.arrays[column][self.size:self.size + n] = values
+        self.size += n
+        return n
+
+    def to_frame(self):
+        return pd.DataFrame({column: array[:self.size] for column, array in self.arrays.items()}, columns=self.decoder.columns)
+
+
+def decode_stream(response, decoder=None):
+    # Returns (DataFrame, batch_count) for a whole search_stream response
+    decoder = decoder or BatchDecoder()
+    buffer = ColumnBuffer(decoder)
+    batch_count = 0
+    for batch in response:
+        batch_count += 1
+        buffer.append(decoder.decode(batch))
+    return buffer.to_frame(), batch_count
@@ -0,0 +1,115 @@
+from aggregation import DATE_BUCKETS, SUM_METRICS, derived_metrics, safe_divide
+from lazy_imports import lazy_import
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# daily_data resolutions: calendar roll-ups, an LTTB sample of the daily points, or the
+# finest of day/week/month that fits max_points ('auto')
+RESOLUTIONS = ('auto', 'day', 'week', 'month', 'lttb')
+
+
+def choose_resolution(days, max_points):
+    if days <= max_points:
+        return 'day'
+    # A range can touch one more calendar week/month than it spans
+    if days // 7 + 2 <= max_points:
+        return 'week'
+    if days // 28 + 2 <= max_points:
+        return 'month'
+    return 'lttb'
+
+
+# Largest-Triangle-Three-Buckets: indices of n_out points of (x, y) that keep the visual shape.
+# The first and last points are kept; the rest are split into n_out - 2 buckets and each bucket
+# keeps the point forming the largest triangle with the previously kept point and the next
+# bucket's average. Bucket averages and the padded (bucket, point) layout are computed for all
+# buckets at once; only the chain of kept points is walked bucket by bucket.
+def lttb_indices(x, y, n_out):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    sum_x = np.concatenate([[0.0], np.cumsum(x)])
+    sum_y = np.concatenate([[0.0], np.cumsum(y)])
+    sizes = ends - starts
+    next_x = np.append(((sum_x[ends] - sum_x[starts]) / sizes)[1:], x[-1])
+    next_y = np.append(((sum_y[ends] - sum_y[starts]) / sizes)[1:], y[-1])
+
+    points = starts[:, None] + np.arange(sizes.max())
+    padding = points >= ends[:, None]
+    points = np.minimum(points, n - 1)
+    bucket_x = x[points]
+    bucket_y = y[points]
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    kept = 0
+    for i in range(n_out - 2):
+        area = np.abs((x[kept] - next_x[i]) * (bucket_y[i] - y[kept])
+                      - (x[kept] - bucket_x[i]) * (next_y[i] - y[kept]))
+        area[padding[i]] = -1.0
+        kept = points[i, area.argmax()]
+        selected[i + 1] = kept
+    return selected
+
+
+def rollup_daily(daily, bucket, label='date', first=()):
+    # Re-aggregate a per-day roll-up into week/month buckets: sums are added up per bucket and
+    # the rates recomputed from them; columns in first keep their first value per bucket.
+    # Works on the (few) daily rows, not on the raw rows.
+    codes, uniques = pd.factorize(DATE_BUCKETS[bucket](pd.to_datetime(daily[label])), sort=True)
+    columns = {label: np.asarray(uniques, dtype=object)}
+    if first:
+        starts = np.unique(codes, return_index=True)[1]
+        for name in first:
+            columns[name] = daily[name].to_numpy()[starts]
+    sums = {}
+    for m in SUM_METRICS:
+        if m not in daily:
+            continue
+        values = daily[m].to_numpy()
+        total = np.bincount(codes, weights=values.astype(np.float64), minlength=len(uniques))
+        sums[m] = total
+        columns[m] = np.rint(total).astype(np.int64) if values.dtype.kind in 'iu' else total
+    if all(m in sums for m in SUM_METRICS):
+        columns.update(derived_metrics(sums))
+    return pd.DataFrame(columns)
+
+
+# Bound the points of a per-day roll-up. Returns (frame, resolution actually used).
+def downsample_daily(daily, resolution='auto', max_points=400, lttb_metric='cost', label='date'):
+    if resolution == 'auto':
+        resolution = choose_resolution(len(daily), max_points)
+    if resolution in ('week', 'month'):
+        return rollup_daily(daily, resolution, label), resolution
+    if resolution == 'lttb' and len(daily) > max_points:
+        x = pd.to_datetime(daily[label]).to_numpy().astype(np.int64)
+        indices = lttb_indices(x, daily[lttb_metric].to_numpy(), max_points)
+        return daily.iloc[indices].reset_index(drop=True), resolution
+    return daily, resolution
+
+
+# downsample_daily for PeriodComparison.daily frames: week/month buckets follow the current
+# period's dates and add up both periods' sums before the rates and changes are recomputed;
+# LTTB keeps the days picked on the current period's lttb_metric.
+def downsample_comparison(daily, resolution='auto', max_points=400, lttb_metric='cost'):
+    if resolution == 'auto':
+        resolution = choose_resolution(len(daily), max_points)
+    if resolution not in ('week', 'month'):
+        return downsample_daily(daily, resolution, max_points, lttb_metric)
+    current = rollup_daily(daily, resolution, first=('day', 'previous_date'))
+    previous = rollup_daily(pd.DataFrame({'date': daily['date'],
+                                          **{m: daily[f'previous_{m}'] for m in SUM_METRICS}}), resolution)
+    columns = {'day': current['day'], 'date': current['date'], 'previous_date': current['previous_date']}
+    for name in previous.columns.drop('date'):
+        change = current[name].to_numpy() - previous[name].to_numpy()
+        columns[name] = current[name]
+        columns[f'previous_{name}'] = previous[name]
+        columns[f'{name}_change'] = change
+        columns[f'{name}_change_pct'] = safe_divide(change, previous[name], 100.0)
+    return pd.DataFrame(columns), resolution
@@ -0,0 +1,172 @@
+import re
+from datetime import datetime
+from aggregation import SUM_METRICS
+from decoding import CAMPAIGN_FIELDS, AD_GROUP_FIELDS, KEYWORD_FIELDS, SEARCH_TERM_FIELDS
+
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+CUSTOMER_ID_PATTERN = re.compile(r'^\d{10}$')
+
+# Enum values accepted by the status / channel filters (CampaignStatus, AdvertisingChannelType)
+CAMPAIGN_STATUSES = ('ENABLED', 'PAUSED', 'REMOVED')
+CHANNEL_TYPES = ('SEARCH', 'DISPLAY', 'SHOPPING', 'HOTEL', 'VIDEO', 'MULTI_CHANNEL', 'LOCAL', 'SMART',
+                 'PERFORMANCE_MAX', 'LOCAL_SERVICES', 'TRAVEL', 'DEMAND_GEN')
+
+# Filterable column -> (GAQL field, allowed values)
+FILTER_FIELDS = {
+    'status': ('campaign.status', CAMPAIGN_STATUSES),
+    'channel_type': ('campaign.advertising_channel_type', CHANNEL_TYPES)
+}
+
+# Columns each dashboard panel reads. The summary's avg_ctr / avg_conversion_rate are means over
+# campaign-day rows, so it needs the date segment even though it shows totals.
+PANEL_COLUMNS = {
+    'summary': ['date', 'impressions', 'clicks', 'cost', 'conversions', 'ctr', 'conversion_rate'],
+    'daily': ['date'] + SUM_METRICS,
+    'campaign': ['campaign_id', 'campaign_name'] + SUM_METRICS,
+    'channel': ['channel_type'] + SUM_METRICS,
+    'status': ['status'] + SUM_METRICS,
+    'raw': [column for column, _, _ in CAMPAIGN_FIELDS]
+}
+PANELS = tuple(PANEL_COLUMNS)
+
+# Drill-down level -> (GAQL resource, decoder fields)
+DRILL_LEVELS = {
+    'ad_group': ('ad_group', AD_GROUP_FIELDS),
+    'keyword': ('keyword_view', KEYWORD_FIELDS),
+    'search_term': ('search_term_view', SEARCH_TERM_FIELDS)
+}
+
+# Most campaigns / ad groups one drill-down query may name
+MAX_DRILL_IDS = 100
+
+
+def validate_date(value, name='date'):
+    if not isinstance(value, str) or not DATE_PATTERN.match(value):
+        raise ValueError(f"{name} must be a date formatted YYYY-MM-DD")
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"{name} is not a valid date: {value}")
+    return value
+
+
+def validate_date_range(start_date, end_date):
+    validate_date(start_date, 'start_date')
+    validate_date(end_date, 'end_date')
+    if end_date < start_date:
+        raise ValueError("end_date is before start_date")
+    return start_date, end_date
+
+
+def normalize_customer_id(value):
+    # '123-456-7890' -> '1234567890'; anything but ten digits is rejected
+    customer_id = str(value or '').replace('-', '').strip()
+    if not CUSTOMER_ID_PATTERN.match(customer_id):
+        raise ValueError(f"Invalid customer ID: {value}")
+    return customer_id
+
+
+def validate_panels(panels):
+    # None / empty -> every panel, in PANELS order
+    if not panels:
+        return PANELS
+    if isinstance(panels, str):
+        panels = [panels]
+    unknown = [panel for panel in panels if panel not in PANEL_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown panels: {', '.join(map(str, unknown))} (expected any of {', '.join(PANELS)})")
+    return tuple(panel for panel in PANELS if panel in panels)
+
+
+def validate_filters(filters):
+    # {'status': ['ENABLED'], 'channel_type': 'SEARCH'} -> {'status': ('ENABLED',), 'channel_type': ('SEARCH',)}
+    if not filters:
+        return {}
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object")
+    normalized = {}
+    for column, values in filters.items():
+        if column not in FILTER_FIELDS:
+            raise ValueError(f"Unknown filter: {column} (expected any of {', '.join(FILTER_FIELDS)})")
+        if isinstance(values, str):
+            values = [values]
+        allowed = FILTER_FIELDS[column][1]
+        values = tuple(sorted({str(value).upper() for value in values}))
+        invalid = [value for value in values if value not in allowed]
+        if invalid or not values:
+            raise ValueError(f"Invalid {column} filter values: {', '.join(invalid) or '(none)'}")
+        normalized[column] = values
+    return normalized
+
+
+def validate_ids(values, name='campaign_ids'):
+    # [123, '456', 123] -> ('123', '456'); only numeric IDs ever reach a query
+    if isinstance(values, (str, int)):
+        values = [values]
+    if not isinstance(values, (list, tuple)) or not values:
+        raise ValueError(f"{name} must be a non-empty list of IDs")
+    ids = {str(value).strip() for value in values}
+    invalid = sorted(value for value in ids if not value.isdigit())
+    if invalid:
+        raise ValueError(f"Invalid {name}: {', '.join(invalid)}")
+    ids = tuple(sorted(ids, key=int))
+    if len(ids) > MAX_DRILL_IDS:
+        raise ValueError(f"At most {MAX_DRILL_IDS} {name} per request")
+    return ids
+
+
+def validate_level(level):
+    if level not in DRILL_LEVELS:
+        raise ValueError(f"Unknown drill-down level: {level} (expected one of {', '.join(DRILL_LEVELS)})")
+    return level
+
+
+def campaign_fields(panels=PANELS):
+    # CAMPAIGN_FIELDS entries (in their usual order) needed by the given panels
+    columns = {column for panel in panels for column in PANEL_COLUMNS[panel]}
+    return [field for field in CAMPAIGN_FIELDS if field[0] in columns]
+
+
+# GAQL for the campaign resource over a validated date range: only the fields the panels need,
+# segments.date only when a panel is per day (otherwise the API returns one row per campaign
+# for the whole range), and status / channel filters pushed into the WHERE clause.
+# Returns (decoder fields, query).
+def plan_campaign_query(start_date, end_date, panels=PANELS, filters=None):
+    validate_date_range(start_date, end_date)
+    fields = campaign_fields(panels)
+    conditions = [f"segments.date BETWEEN '{start_date}' AND '{end_date}'"]
+    for column, values in validate_filters(filters).items():
+        conditions.append(f"{FILTER_FIELDS[column][0]} IN ({', '.join(repr(value) for value in values)})")
+
+    query = "SELECT " + ", ".join(path for _, path, _ in fields)
+    query += " FROM campaign WHERE " + " AND ".join(conditions)
+    if any(column == 'date' for column, _, _ in fields):
+        query += " ORDER BY segments.date"
+    return fields, query
+
+
+# GAQL for one drill-down level under the given campaigns (and optionally ad groups): totals
+# for the whole range, with no date segment, so each keyword / search term is a single row.
+# Returns (decoder fields, query).
+def plan_drilldown_query(level, start_date, end_date, campaign_ids, ad_group_ids=None):
+    validate_date_range(start_date, end_date)
+    resource, fields = DRILL_LEVELS[validate_level(level)]
+    conditions = [f"segments.date BETWEEN '{start_date}' AND '{end_date}'",
+                  f"campaign.id IN ({', '.join(validate_ids(campaign_ids))})"]
+    if ad_group_ids:
+        conditions.append(f"ad_group.id IN ({', '.join(validate_ids(ad_group_ids, 'ad_group_ids'))})")
+
+    query = "SELECT " + ", ".join(path for _, path, _ in fields)
+    query += f" FROM {resource} WHERE " + " AND ".join(conditions)
+    return fields, query
+
+
+def filter_campaign_rows(df, filters):
+    # Same filters applied to rows already held locally (warehouse, cache)
+    if not filters or df.empty:
+        return df
+    mask = None
+    for column, values in filters.items():
+        match = df[column].isin(values)
+        mask = match if mask is None else mask & match
+    return df[mask].reset_index(drop=True)
@@ -0,0 +1,46 @@
+import importlib.util
+import multiprocessing
+import os
+
+# Gunicorn settings: `gunicorn -c gunicorn.conf.py wsgi:app`
+#
+# /fetch_data and the customer directory spend most of their time waiting on Google Ads
+# search_stream calls, so workers must be able to serve other requests while a call is in
+# flight. The default gthread worker gives each process a pool of threads (gRPC releases the
+# GIL while it waits); GUNICORN_WORKER_CLASS=gevent switches to cooperative greenlets, which
+# needs `pip install gevent` and is only enabled when gevent is importable.
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread').lower()
+if worker_class == 'gevent' and importlib.util.find_spec('gevent') is None:
+    print("gevent is not installed; falling back to gthread workers")
+    worker_class = 'gthread'
+
+# Each worker keeps its own client pool, caches and warehouse connection, so a few
+# processes with many threads use far less memory than many single-threaded processes
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+
+# Concurrent requests per gthread worker
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Concurrent requests per gevent worker
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+# Long syncs over many accounts can take a while; the timeout only guards hung workers
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    # The gevent worker has monkey-patched the process by now; gRPC has its own I/O loop and
+    # must be told to yield to the gevent hub, or a streaming call blocks every greenlet in
+    # the worker. app.py imports the Google Ads client lazily, so no channel exists yet.
+    if worker_class == 'gevent':
+        from grpc.experimental import gevent as grpc_gevent
+        grpc_gevent.init_gevent()
+        worker.log.info("gRPC gevent integration enabled")
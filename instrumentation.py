@@ -0,0 +1,195 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Latency buckets in seconds (Prometheus' defaults plus a few slower ones for large syncs)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Spans recorded during the current request, for the Server-Timing header.
+# Code running outside a request (worker threads, the prefetcher) only feeds the histograms.
+_request_spans = ContextVar('request_spans', default=None)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}')
+        return lines
+
+
+# Cumulative-bucket histogram in the Prometheus text format
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series['counts']):
+                    cumulative += count
+                    labels = _format_labels(self.label_names, key, [('le', _format_value(bound))])
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                labels = _format_labels(self.label_names, key)
+                lines.append(f'{self.name}_sum{labels} {_format_value(series["sum"])}')
+                lines.append(f'{self.name}_count{labels} {series["count"]}')
+        return lines
+
+
+# Metrics are per process: with several gunicorn workers each one serves its own /metrics
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._caches = {}
+
+    def counter(self, name, help_text, label_names=()):
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_cache(self, name, cache):
+        # Any object with hits/misses counters (TTLCache, ClientRegistry)
+        self._caches[name] = cache
+
+    def _render_caches(self, prefix):
+        stats = {name: (cache.hits, cache.misses) for name, cache in sorted(self._caches.items())}
+        lines = [f'# HELP {prefix}_cache_hits_total Cache lookups answered from the cache',
+                 f'# TYPE {prefix}_cache_hits_total counter']
+        lines += [f'{prefix}_cache_hits_total{{cache="{name}"}} {hits}' for name, (hits, _) in stats.items()]
+        lines += [f'# HELP {prefix}_cache_misses_total Cache lookups that missed',
+                  f'# TYPE {prefix}_cache_misses_total counter']
+        lines += [f'{prefix}_cache_misses_total{{cache="{name}"}} {misses}' for name, (_, misses) in stats.items()]
+        lines += [f'# HELP {prefix}_cache_hit_ratio Share of cache lookups that hit since startup',
+                  f'# TYPE {prefix}_cache_hit_ratio gauge']
+        lines += [f'{prefix}_cache_hit_ratio{{cache="{name}"}} {_format_value(hits / (hits + misses) if hits + misses else 0.0)}'
+                  for name, (hits, misses) in stats.items()]
+        return lines
+
+    def render(self, prefix='grow_ads'):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        if self._caches:
+            lines += self._render_caches(prefix)
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUEST_SECONDS = registry.histogram(
+    'grow_ads_request_seconds', 'Request latency by endpoint', ['endpoint', 'method', 'status'])
+PHASE_SECONDS = registry.histogram(
+    'grow_ads_phase_seconds', 'Time spent in each phase of serving dashboard data', ['phase'])
+ROWS_TOTAL = registry.counter(
+    'grow_ads_rows_total', 'Campaign rows processed, by source', ['source'])
+BATCHES_TOTAL = registry.counter(
+    'grow_ads_stream_batches_total', 'search_stream batches received')
+API_CALLS_TOTAL = registry.counter(
+    'grow_ads_api_calls_total', 'Google Ads API calls by outcome (ok, retried, failed, error, rejected)', ['outcome'])
+
+
+def start_request():
+    _request_spans.set([])
+
+
+def request_spans():
+    return _request_spans.get() or []
+
+
+def record_span(phase, seconds):
+    PHASE_SECONDS.observe(seconds, phase=phase)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((phase, seconds))
+
+
+@contextmanager
+def span(phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(phase, time.perf_counter() - started)
+
+
+def timed_batches(response):
+    # Wraps a search_stream response: the wait for the first batch is recorded as
+    # 'first_batch' and every later wait as 'stream', so API time is split from decode time
+    started = time.perf_counter()
+    phase = 'first_batch'
+    for batch in response:
+        record_span(phase, time.perf_counter() - started)
+        BATCHES_TOTAL.inc()
+        phase = 'stream'
+        yield batch
+        started = time.perf_counter()
+
+
+def server_timing(spans, total=None):
+    # Repeated phases (one decode span per batch) are summed into a single entry
+    merged = {}
+    for phase, seconds in spans:
+        duration, count = merged.get(phase, (0.0, 0))
+        merged[phase] = (duration + seconds, count + 1)
+    entries = []
+    for phase, (seconds, count) in merged.items():
+        entry = f'{phase};dur={seconds * 1000:.1f}'
+        if count > 1:
+            entry += f';desc="{count}x"'
+        entries.append(entry)
+    if total is not None:
+        entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
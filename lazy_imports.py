@@ -0,0 +1,29 @@
+import importlib
+
+
+# Stand-in for a module that is only imported on first attribute access, so heavy
+# dependencies (pandas, the google-ads/gRPC stack) stay out of worker startup:
+#     pd = lazy_import('pandas')
+# Works in `except module.SomeError:` clauses too, since those are only evaluated
+# once an exception is being matched.
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            # import_module holds the import lock, so concurrent first uses are safe
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
@@ -0,0 +1,24 @@
+from google.oauth2.credentials import Credentials
+from token_manager import to_utc_naive
+
+
+# OAuth credentials whose access token comes from a TokenManager: building a client with
+# them costs no token exchange when the manager already holds a fresh token, and expired
+# tokens are refreshed once per refresh token rather than once per client.
+class ManagedCredentials(Credentials):
+    def __init__(self, manager, refresh_token):
+        token, expires_at = manager.cached(refresh_token)
+        super().__init__(
+            token,
+            refresh_token=refresh_token,
+            token_uri=manager.token_uri,
+            client_id=manager.client_id,
+            client_secret=manager.client_secret,
+            expiry=to_utc_naive(expires_at) if expires_at else None
+        )
+        self._manager = manager
+
+    def refresh(self, request):
+        token, expires_at = self._manager.get_token(self.refresh_token)
+        self.token = token
+        self.expiry = to_utc_naive(expires_at)
@@ -0,0 +1,50 @@
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from lazy_imports import lazy_import
+pd = lazy_import('pandas')
+
+# One semaphore per customer so concurrent requests never run more than
+# per_account_limit API calls against the same account at once. Weak values: an account's
+# semaphore lives only while some fetch holds it, so the dict does not grow with every
+# customer ID ever queried
+_account_semaphores = weakref.WeakValueDictionary()
+_account_semaphores_lock = threading.Lock()
+
+
+def _account_semaphore(customer_id, limit):
+    with _account_semaphores_lock:
+        semaphore = _account_semaphores.get(customer_id)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(limit)
+            _account_semaphores[customer_id] = semaphore
+        return semaphore
+
+
+# Run fetch_one(customer_id) -> DataFrame for every account on a bounded thread pool.
+# Returns the concatenated rows (tagged with customer_id) and a {customer_id: error} dict.
+# Quota budgets and retries are handled per API call by the app's ApiScheduler, so an account
+# is only reported as failed once its calls have exhausted their retries.
+def fetch_accounts(customer_ids, fetch_one, max_workers=8, per_account_limit=1):
+    def run(customer_id):
+        with _account_semaphore(customer_id, per_account_limit):
+            return fetch_one(customer_id)
+
+    frames = []
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(customer_ids)))) as executor:
+        futures = {executor.submit(run, customer_id): customer_id for customer_id in customer_ids}
+        for future in as_completed(futures):
+            customer_id = futures[future]
+            try:
+                df = future.result()
+            except Exception as e:
+                print(f"Error fetching customer ID {customer_id}: {e}")
+                errors[customer_id] = str(e)
+                continue
+            if not df.empty:
+                frames.append(df.assign(customer_id=customer_id))
+
+    if not frames:
+        return pd.DataFrame(), errors
+    return pd.concat(frames, ignore_index=True), errors
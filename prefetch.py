@@ -0,0 +1,90 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Periodically re-runs task(refresh_token, customer_id) for the accounts users opened recently,
+# on a daemon thread with at most max_workers concurrent tasks. The thread starts on the first
+# record() call, i.e. inside each gunicorn worker after it has forked.
+#
+# Every worker keeps its own list of the accounts it served and prefetches them on its own
+# schedule; overlapping syncs of one account are serialised by the warehouse sync lock, which
+# re-checks what is missing, so the API is not queried twice. forget() only clears the calling
+# worker's list: other workers drop the account once it has not been used for recent_seconds.
+class PrefetchScheduler:
+    def __init__(self, task, interval_seconds=3600, max_workers=2, recent_seconds=72 * 3600, max_accounts=50):
+        self.task = task
+        self.interval_seconds = interval_seconds
+        self.max_workers = max_workers
+        self.recent_seconds = recent_seconds
+        self.max_accounts = max_accounts
+        self.runs = 0
+        self.failures = 0
+        self._accounts = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, refresh_token, customer_id):
+        token_hash = hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+        with self._lock:
+            self._accounts[(token_hash, customer_id)] = (refresh_token, customer_id, time.time())
+            # Keep only the most recently used accounts
+            if len(self._accounts) > self.max_accounts:
+                oldest = sorted(self._accounts, key=lambda key: self._accounts[key][2])
+                for key in oldest[:len(self._accounts) - self.max_accounts]:
+                    del self._accounts[key]
+        self.start()
+
+    def forget(self, refresh_token):
+        # Stop prefetching every account recorded for this token (logout)
+        token_hash = hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+        with self._lock:
+            for key in [k for k in self._accounts if k[0] == token_hash]:
+                del self._accounts[key]
+
+    def recent_accounts(self):
+        cutoff = time.time() - self.recent_seconds
+        with self._lock:
+            for key in [k for k, (_, _, used_at) in self._accounts.items() if used_at < cutoff]:
+                del self._accounts[key]
+            return [(refresh_token, customer_id) for refresh_token, customer_id, _ in self._accounts.values()]
+
+    def run_once(self):
+        accounts = self.recent_accounts()
+        if not accounts:
+            return
+        print(f"Prefetching {len(accounts)} recently used account(s)")
+
+        def run(account):
+            refresh_token, customer_id = account
+            try:
+                self.task(refresh_token, customer_id)
+                return True
+            except Exception as e:
+                print(f"Prefetch failed for customer ID {customer_id}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(run, accounts))
+        self.runs += 1
+        self.failures += results.count(False)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Prefetch run failed: {e}")
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='prefetch-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
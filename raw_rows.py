@@ -0,0 +1,38 @@
+from lazy_imports import lazy_import
+np = lazy_import('numpy')
+
+# Columns that can be filtered with an exact match
+EXACT_FILTERS = {
+    'channel': 'channel_type',
+    'status': 'status'
+}
+
+
+def filter_rows(df, campaign=None, channel=None, status=None, date_from=None, date_to=None):
+    # Build one boolean mask over the cached frame instead of copying it per filter
+    mask = np.ones(len(df), dtype=bool)
+    if campaign:
+        mask &= df['campaign_name'].str.contains(campaign, case=False, regex=False).to_numpy(dtype=bool)
+    for value, column in ((channel, EXACT_FILTERS['channel']), (status, EXACT_FILTERS['status'])):
+        if value:
+            mask &= (df[column] == value).to_numpy(dtype=bool)
+    if date_from:
+        mask &= (df['date'] >= date_from).to_numpy(dtype=bool)
+    if date_to:
+        mask &= (df['date'] <= date_to).to_numpy(dtype=bool)
+    return df[mask] if not mask.all() else df
+
+
+def page_rows(df, sort=None, descending=False, offset=0, limit=50):
+    # Sort positions only (stable, so equal keys keep their date order) and slice one page.
+    # Descending sorts the negated dense rank, which works for text columns too and keeps ties
+    # in date order, unlike reversing the ascending order.
+    if sort:
+        values = df[sort].to_numpy()
+        if descending:
+            values = -np.unique(values, return_inverse=True)[1]
+        order = np.argsort(values, kind='stable')
+        positions = order[offset:offset + limit]
+    else:
+        positions = np.arange(offset, min(offset + limit, len(df)))
+    return df.iloc[positions]
@@ -0,0 +1,129 @@
+from datetime import datetime
+from lazy_imports import lazy_import
+np = lazy_import('numpy')
+
+# Per-channel delivery profile: daily impressions per campaign, CTR, CPC, conversion
+# rate, value per conversion, video view rate and view-through conversions per impression
+CHANNEL_PROFILES = {
+    'SEARCH': {'impressions': 3000, 'ctr': 0.05, 'cpc': 1.60, 'cvr': 0.060, 'value': 90, 'view_rate': 0.0, 'vtc': 0.0},
+    'DISPLAY': {'impressions': 20000, 'ctr': 0.006, 'cpc': 0.60, 'cvr': 0.020, 'value': 60, 'view_rate': 0.0, 'vtc': 2e-4},
+    'VIDEO': {'impressions': 12000, 'ctr': 0.010, 'cpc': 0.30, 'cvr': 0.010, 'value': 50, 'view_rate': 0.30, 'vtc': 3e-4},
+    'SHOPPING': {'impressions': 6000, 'ctr': 0.020, 'cpc': 0.80, 'cvr': 0.045, 'value': 70, 'view_rate': 0.0, 'vtc': 0.0},
+    'PERFORMANCE_MAX': {'impressions': 15000, 'ctr': 0.012, 'cpc': 0.90, 'cvr': 0.035, 'value': 80, 'view_rate': 0.05, 'vtc': 1e-4}
+}
+
+DEFAULT_CHANNEL_MIX = {'SEARCH': 1, 'DISPLAY': 1, 'VIDEO': 1, 'SHOPPING': 1}
+
+# Relative demand Monday..Sunday
+WEEKDAY_FACTORS = [1.05, 1.08, 1.06, 1.04, 0.98, 0.88, 0.91]
+
+
+def parse_channel_mix(value):
+    # 'SEARCH=0.5,DISPLAY=0.3,VIDEO=0.2' -> {'SEARCH': 0.5, ...}; empty -> DEFAULT_CHANNEL_MIX
+    if not value:
+        return dict(DEFAULT_CHANNEL_MIX)
+    mix = {}
+    for part in value.split(','):
+        channel, _, weight = part.partition('=')
+        channel = channel.strip().upper()
+        if channel not in CHANNEL_PROFILES:
+            raise ValueError(f"Unknown channel in sample channel mix: {channel}")
+        mix[channel] = float(weight) if weight else 1.0
+    return mix
+
+
+def _allocate_channels(campaigns, channel_mix, rng):
+    # Largest-remainder split so small counts still follow the mix (4 campaigns -> one per channel)
+    channels = list(channel_mix)
+    weights = np.array([channel_mix[channel] for channel in channels], dtype=np.float64)
+    shares = weights / weights.sum() * campaigns
+    counts = np.floor(shares).astype(np.int64)
+    counts[np.argsort(counts - shares, kind='stable')[:campaigns - counts.sum()]] += 1
+    return rng.permutation(np.repeat(np.array(channels, dtype=object), counts))
+
+
+def _seasonality(days):
+    # Weekly cycle, a Q4 peak / early-Q1 trough and a gentle upward trend
+    weekday = np.asarray(WEEKDAY_FACTORS)[(days.astype(np.int64) + 3) % 7]
+    day_of_year = (days - days.astype('datetime64[Y]')).astype(np.int64)
+    yearly = 1 + 0.25 * np.cos(2 * np.pi * (day_of_year - 335) / 365.25)
+    trend = 1 + 0.0005 * np.arange(len(days))
+    return weekday * yearly * trend
+
+
+def _counts(mean, variance, noise, upper=None):
+    # Normal approximation of Poisson/binomial draws from a row of standard normal noise, rounded
+    # and clipped to [0, upper]: several times faster than the exact samplers at millions of rows
+    counts = np.rint(mean + np.sqrt(variance) * noise)
+    counts = np.maximum(counts, 0) if upper is None else np.clip(counts, 0, upper)
+    return counts.astype(np.int64)
+
+
+# Demo/staging data for the dashboard fallback and load tests. Returns {column: NumPy array}
+# in warehouse column order, date-major like the API's ORDER BY segments.date. Output is
+# deterministic for a given seed, and each metric is drawn from the one it depends on
+# (impressions -> clicks -> conversions -> value), so rates and totals stay plausible.
+def generate_sample_data(start_date, end_date, campaigns=4, channel_mix=None, seed=0):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(datetime.strptime(start_date, '%Y-%m-%d').date(), 'D')
+    end = np.datetime64(datetime.strptime(end_date, '%Y-%m-%d').date(), 'D')
+    days = np.arange(start, end + 1, dtype='datetime64[D]')
+    n_days = len(days)
+
+    channels = _allocate_channels(campaigns, channel_mix or DEFAULT_CHANNEL_MIX, rng)
+    profile = {key: np.array([CHANNEL_PROFILES[channel][key] for channel in channels], dtype=np.float64)
+               for key in next(iter(CHANNEL_PROFILES.values()))}
+
+    # Per-campaign traits: size and efficiency vary around the channel profile
+    scale = profile['impressions'] * rng.lognormal(0, 0.8, campaigns)
+    ctr = np.clip(profile['ctr'] * rng.lognormal(0, 0.3, campaigns), 1e-4, 0.5)
+    cpc = profile['cpc'] * rng.lognormal(0, 0.25, campaigns)
+    cvr = np.clip(profile['cvr'] * rng.lognormal(0, 0.35, campaigns), 0, 0.5)
+    value = profile['value'] * rng.lognormal(0, 0.3, campaigns)
+    paused = rng.random(campaigns) < 0.15
+
+    # Rows are (day, campaign): metrics are built as (days, campaigns) matrices so campaign
+    # traits broadcast across days, then flattened. All row-level noise is drawn in one
+    # float32 block (the draws dominate the cost at millions of rows).
+    noise = rng.standard_normal((6, n_days, campaigns), dtype=np.float32)
+    demand = np.outer(_seasonality(days), scale) * np.exp(0.15 * noise[0])
+
+    impressions = _counts(demand, demand, noise[1])
+    clicks = _counts(impressions * ctr, impressions * (ctr * (1 - ctr)), noise[2], impressions)
+    conversions = _counts(clicks * cvr, clicks * (cvr * (1 - cvr)), noise[3], clicks).astype(np.float64)
+    cost = np.round(clicks * cpc * np.exp(0.1 * noise[4]), 2)
+    conversion_value = np.round(conversions * value * np.exp(0.25 * noise[5]), 2)
+    # Secondary metrics reuse the impression noise rather than paying for more draws
+    video_views = np.rint(impressions * profile['view_rate']).astype(np.int64)
+    view_through = impressions * profile['vtc']
+    view_through_conversions = _counts(view_through, view_through, noise[1]).astype(np.float64)
+
+    impressions_safe = np.maximum(impressions, 1)
+    clicks_safe = np.maximum(clicks, 1)
+    ctr_pct = np.round(clicks / impressions_safe * 100, 2)
+
+    names = np.array([f"{channel.replace('_', ' ').title()} Campaign {i + 1}" for i, channel in enumerate(channels)],
+                     dtype=object)
+    statuses = np.where(paused, 'PAUSED', 'ENABLED').astype(object)
+    date_labels = np.datetime_as_string(days).astype(object)
+
+    columns = {
+        'campaign_id': np.tile(1000000000 + np.arange(campaigns, dtype=np.int64) * 7919, n_days),
+        'campaign_name': np.tile(names, n_days),
+        'status': np.tile(statuses, n_days),
+        'channel_type': np.tile(channels, n_days),
+        'date': np.repeat(date_labels, campaigns),
+        'impressions': impressions,
+        'clicks': clicks,
+        'ctr': ctr_pct,
+        'avg_cpc': np.round(np.where(clicks > 0, cost / clicks_safe, 0), 2),
+        'conversions': conversions,
+        'conversion_value': conversion_value,
+        'cost': cost,
+        'conversion_rate': np.round(np.where(clicks > 0, conversions / clicks_safe * 100, 0), 2),
+        # Interactions are clicks plus engagements (video views count for video-heavy channels)
+        'interaction_rate': np.round((clicks + video_views * 0.1) / impressions_safe * 100, 2),
+        'video_views': video_views,
+        'view_through_conversions': view_through_conversions
+    }
+    return {column: values.ravel() for column, values in columns.items()}
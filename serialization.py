@@ -0,0 +1,79 @@
+import json
+from lazy_imports import lazy_import
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib encoder is used instead
+    orjson = None
+
+# 'records': [{column: value, ...}, ...] (what dashboard.js reads)
+# 'columns': {'columns': [...], 'data': [[column values], ...]} (smaller, no per-row keys)
+LAYOUTS = ('records', 'columns')
+
+
+def _column_values(series):
+    # NumPy-backed numeric columns go to orjson untouched; everything else becomes a plain list
+    values = series.to_numpy()
+    if orjson is not None and values.dtype.kind in 'iufb':
+        return values
+    return values.tolist()
+
+
+def frame_to_layout(df, layout='records'):
+    columns = [str(column) for column in df.columns]
+    if layout == 'columns':
+        return {'columns': columns, 'data': [_column_values(df[column]) for column in df.columns]}
+
+    # One tolist() per column unboxes every value in C, then rows are zipped back together
+    values = [df[column].to_numpy().tolist() for column in df.columns]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def _prepare(value, layout):
+    if isinstance(value, pd.DataFrame):
+        return frame_to_layout(value, layout)
+    if isinstance(value, dict):
+        return {key: _prepare(item, layout) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_prepare(item, layout) for item in value]
+    return value
+
+
+def _default(value):
+    # Fallback for the stdlib encoder (and for anything orjson does not know)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_orjson(payload):
+    return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def encode_stdlib(payload):
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+ENCODERS = {
+    'orjson': encode_orjson,
+    'json': encode_stdlib
+}
+
+
+def get_encoder(name='auto'):
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'json'
+    if name == 'orjson' and orjson is None:
+        raise ValueError("orjson encoder requested but orjson is not installed")
+    return ENCODERS[name]
+
+
+# Serialize a dashboard payload whose values may be DataFrames, straight from their columns
+def encode_payload(payload, layout='records', encoder='auto'):
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout}")
+    return get_encoder(encoder)(_prepare(payload, layout))
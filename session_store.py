@@ -0,0 +1,123 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from flask_session import Session
+from flask_session.base import ServerSideSession, ServerSideSessionInterface
+
+SESSION_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        data BLOB NOT NULL,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at);
+"""
+
+
+class SqliteSession(ServerSideSession):
+    pass
+
+
+# Flask-Session backend storing msgpack-encoded sessions in a local SQLite file (WAL mode),
+# so every gunicorn worker on the host shares them. Expired rows are ignored on read and
+# purged on average every cleanup_n_requests requests.
+class SqliteSessionInterface(ServerSideSessionInterface):
+    session_class = SqliteSession
+    ttl = False
+
+    def __init__(self, app, path, key_prefix='session:', permanent=True, sid_length=32,
+                 serialization_format='msgpack', cleanup_n_requests=1000):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SESSION_SCHEMA)
+        super().__init__(app, key_prefix, False, permanent, sid_length, serialization_format, cleanup_n_requests)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _retrieve_session_data(self, store_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT data FROM sessions WHERE id = ? AND expires_at > ?', (store_id, time.time())
+            ).fetchone()
+        return self.serializer.decode(row[0]) if row else None
+
+    def _delete_session(self, store_id):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM sessions WHERE id = ?', (store_id,))
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)',
+                (store_id, self.serializer.encode(session), time.time() + session_lifetime.total_seconds())
+            )
+
+    def _delete_expired_sessions(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (time.time(),))
+
+    def open_session(self, app, request):
+        # Static files never read the session; skip the store lookup for them
+        if app.static_url_path and request.path.startswith(app.static_url_path + '/'):
+            return self.session_class(sid=self._generate_sid(self.sid_length), permanent=self.permanent)
+        return super().open_session(app, request)
+
+
+# Server-side sessions: the cookie carries only a random session ID and the data lives in
+#   sqlite     - a local SQLite file shared by the workers on one host (default)
+#   filesystem - one file per session (cachelib)
+#   redis      - any Redis-compatible server at REDIS_URL, shared across hosts (needs the optional
+#                redis package, as with Flask-Session itself)
+def init_session(app, config):
+    session_type = config.SESSION_TYPE.lower()
+    app.config.update(
+        SESSION_PERMANENT=True,
+        PERMANENT_SESSION_LIFETIME=timedelta(days=config.SESSION_LIFETIME_DAYS),
+        SESSION_KEY_PREFIX='session:',
+        SESSION_COOKIE_HTTPONLY=True,
+        SESSION_COOKIE_SAMESITE='Lax',
+        SESSION_COOKIE_SECURE=config.SESSION_COOKIE_SECURE
+    )
+
+    if session_type == 'sqlite':
+        app.session_interface = SqliteSessionInterface(
+            app,
+            config.SESSION_SQLITE_PATH,
+            permanent=True,
+            cleanup_n_requests=config.SESSION_CLEANUP_N_REQUESTS
+        )
+        return app.session_interface
+
+    if session_type == 'redis':
+        if not config.REDIS_URL:
+            raise ValueError("SESSION_TYPE=redis requires REDIS_URL")
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("SESSION_TYPE=redis requires the redis package (pip install redis)")
+        app.config['SESSION_TYPE'] = 'redis'
+        app.config['SESSION_REDIS'] = redis.from_url(config.REDIS_URL)
+    elif session_type == 'filesystem':
+        from cachelib.file import FileSystemCache
+        app.config['SESSION_TYPE'] = 'cachelib'
+        app.config['SESSION_CACHELIB'] = FileSystemCache(config.SESSION_FILE_DIR, threshold=config.SESSION_FILE_THRESHOLD)
+    else:
+        raise ValueError(f"Unknown SESSION_TYPE: {config.SESSION_TYPE}")
+
+    Session(app)
+    return app.session_interface
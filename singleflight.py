@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-worker locking, in-process coalescing still applies
+    fcntl = None
+
+# Cross-worker locks are striped over a fixed set of files so lock_dir never grows; two
+# unrelated keys sharing a stripe only ever wait on each other, never on a wrong result
+LOCK_STRIPES = 256
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Coalesces identical concurrent calls: the first caller for a key runs the function and
+# every caller that arrives while it is in flight waits and receives the same result (or
+# exception). Nothing is cached once the flight lands.
+#
+# With lock_dir set, exclusive(key) also serialises a key across processes (gunicorn workers
+# on one host) with an flock'd file, for work whose result other workers can pick up from
+# shared storage afterwards, like a warehouse sync.
+class SingleFlight:
+    def __init__(self, lock_dir=None):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        # hits: callers that shared another caller's flight; misses: flights run
+        self.hits = 0
+        self.misses = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    # Returns (result, shared); shared is True when the result came from another caller's flight
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+                leader = True
+            else:
+                self.hits += 1
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+            return flight.result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    @contextmanager
+    def exclusive(self, key):
+        if not self.lock_dir:
+            yield
+            return
+        stripe = int(flight_key(key), 16) % LOCK_STRIPES
+        path = os.path.join(self.lock_dir, f'{stripe:03d}.lock')
+        with open(path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def flight_key(*parts):
+    # Stable short key for any JSON-serialisable parts (safe as a file name)
+    encoded = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:32]
@@ -89,6 +89,12 @@ document.addEventListener('DOMContentLoaded', function() {
     // Add event listeners
     fetchDataBtn.addEventListener('click', fetchData);
     
+    // The account list itself may have failed to load (set by the server on the page)
+    const pageNotice = document.getElementById('degraded-notice');
+    if (pageNotice && pageNotice.dataset.degraded) {
+        showDegradedNotice(JSON.parse(pageNotice.dataset.degraded));
+    }
+    
     navLinks.forEach(link => {
         link.addEventListener('click', function(e) {
             e.preventDefault();
@@ -108,6 +114,12 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
+    // Date ranges longer than this many days are fetched through the streaming endpoint
+    const STREAM_THRESHOLD_DAYS = 180;
+    
+    // Last payload and ETag per query, reused when /fetch_data answers 304 Not Modified
+    const payloadCache = new Map();
+    
     // Fetch data from API
     async function fetchData() {
         const customerId = customerSelect.value;
@@ -123,24 +135,49 @@ document.addEventListener('DOMContentLoaded', function() {
         loadingOverlay.style.display = 'flex';
         
         try {
+            const body = JSON.stringify({
+                customer_id: customerId,
+                start_date: startDate,
+                end_date: endDate
+            });
+            resetDrilldown({ customer_id: customerId, start_date: startDate, end_date: endDate });
+            const headers = {
+                'Content-Type': 'application/json'
+            };
+            
+            // Long ranges are streamed so the summary and daily charts fill in progressively
+            const rangeDays = (new Date(endDate) - new Date(startDate)) / 86400000;
+            if (rangeDays > STREAM_THRESHOLD_DAYS) {
+                updateDashboard(await fetchDataStream(body));
+                return;
+            }
+            
+            // Revalidate a previously loaded range: the server answers 304 if nothing changed
+            const cached = payloadCache.get(body);
+            if (cached) {
+                headers['If-None-Match'] = cached.etag;
+            }
+            
             const response = await fetch('/fetch_data', {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    customer_id: customerId,
-                    start_date: startDate,
-                    end_date: endDate
-                })
+                headers: headers,
+                body: body
             });
             
-            if (!response.ok) {
-                throw new Error('Failed to fetch data');
+            let data;
+            if (response.status === 304 && cached) {
+                data = cached.data;
+            } else if (!response.ok) {
+                const error = await response.json().catch(() => ({}));
+                throw new Error(error.error || 'Failed to fetch data');
+            } else {
+                data = await response.json();
+                const etag = response.headers.get('ETag');
+                if (etag) {
+                    payloadCache.set(body, { etag: etag, data: data });
+                }
             }
             
-            const data = await response.json();
-            
             // Update dashboard with data
             updateDashboard(data);
         } catch (error) {
@@ -152,8 +189,64 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // Read /fetch_data_stream (NDJSON) and render progress messages as they arrive
+    async function fetchDataStream(body) {
+        const response = await fetch('/fetch_data_stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: body
+        });
+        
+        if (!response.ok) {
+            throw new Error('Failed to fetch data');
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        let result = null;
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) {
+                break;
+            }
+            
+            buffered += decoder.decode(value, { stream: true });
+            const lines = buffered.split('\n');
+            buffered = lines.pop();
+            
+            for (const line of lines) {
+                if (!line.trim()) {
+                    continue;
+                }
+                
+                const message = JSON.parse(line);
+                if (message.type === 'progress') {
+                    // Partial data is on screen, so the overlay can go
+                    loadingOverlay.style.display = 'none';
+                    updateSummaryMetrics(message.summary);
+                    createDailyCharts(message.daily_data);
+                } else if (message.type === 'result') {
+                    result = message;
+                } else if (message.type === 'error') {
+                    throw new Error(message.error);
+                }
+            }
+        }
+        
+        if (!result) {
+            throw new Error('Data stream ended unexpectedly');
+        }
+        return result;
+    }
+    
     // Update dashboard with data
     function updateDashboard(data) {
+        showDegradedNotice(data.degraded);
+        
         // Update summary metrics
         updateSummaryMetrics(data.summary);
         
@@ -164,7 +257,29 @@ document.addEventListener('DOMContentLoaded', function() {
         createChannelCharts(data.channel_data);
         
         // Update raw data table
-        updateDataTable(data.raw_data);
+        updateDataTable(data);
+    }
+    
+    // Payloads not built from a fresh Google Ads answer carry a 'degraded' block
+    function showDegradedNotice(degraded) {
+        const notice = document.getElementById('degraded-notice');
+        if (!notice) {
+            return;
+        }
+        if (!degraded) {
+            notice.style.display = 'none';
+            return;
+        }
+        let text;
+        if (degraded.source === 'warehouse') {
+            text = 'Google Ads is not answering right now; showing previously synced data, which may be incomplete or out of date.';
+        } else if (degraded.source === 'directory') {
+            text = 'Your Google Ads accounts could not be loaded; reload the page to try again.';
+        } else {
+            text = 'Showing sample data, not your account\'s figures.';
+        }
+        notice.textContent = `${text} (${degraded.reason})`;
+        notice.style.display = 'block';
     }
     
     // Update summary metrics
@@ -825,6 +940,18 @@ document.addEventListener('DOMContentLoaded', function() {
             };
             
             charts.campaignCost.setOption(campaignCostOption);
+            
+            // Drill into a campaign's ad groups, keywords or search terms ('Other' is not a campaign)
+            charts.campaignCost.off('click');
+            charts.campaignCost.on('click', function(params) {
+                const campaign = campaignData[params.dataIndex];
+                if (campaign && !campaign.is_other) {
+                    drilldownState.campaignName = campaign.campaign_name;
+                    drilldownState.adGroupId = null;
+                    drilldownState.adGroupName = null;
+                    loadDrilldown();
+                }
+            });
         }
         
         // 2. Campaign Pie Chart
@@ -946,8 +1073,9 @@ document.addEventListener('DOMContentLoaded', function() {
                 charts.campaignWaterfall = echarts.init(campaignWaterfallChart);
             }
             
-            // Sort campaigns by cost for waterfall chart
-            const sortedCampaigns = [...campaignData].sort((a, b) => b.cost - a.cost).slice(0, 5);
+            // campaign_data arrives ranked by the server (largest first, long tail folded into
+            // one row flagged is_other), so the top 5 are simply the first real campaigns
+            const sortedCampaigns = campaignData.filter(campaign => !campaign.is_other).slice(0, 5);
             
             const campaignWaterfallOption = {
                 title: {
@@ -1468,13 +1596,122 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
-    // Update data table
-    function updateDataTable(rawData) {
-        if (!rawData || rawData.length === 0) {
-            console.warn('No raw data available for table');
+    // Raw data table state (rows are paged from the server, never shipped in full)
+    const rawTableState = {
+        offset: 0,
+        limit: 50,
+        sort: null,
+        order: 'asc',
+        campaign: '',
+        channel: '',
+        status: ''
+    };
+    
+    // Format column headers
+    const displayHeaders = {
+        'campaign_id': 'Campaign ID',
+        'campaign_name': 'Campaign Name',
+        'status': 'Status',
+        'channel_type': 'Channel Type',
+        'date': 'Date',
+        'impressions': 'Impressions',
+        'clicks': 'Clicks',
+        'ctr': 'CTR (%)',
+        'avg_cpc': 'Avg. CPC ($)',
+        'conversions': 'Conversions',
+        'conversion_value': 'Conv. Value ($)',
+        'cost': 'Cost ($)',
+        'conversion_rate': 'Conv. Rate (%)',
+        'interaction_rate': 'Interaction Rate (%)',
+        'video_views': 'Video Views',
+        'view_through_conversions': 'View-Through Conv.',
+        'customer_id': 'Customer ID',
+        'ad_group_id': 'Ad Group ID',
+        'ad_group_name': 'Ad Group',
+        'keyword': 'Keyword',
+        'match_type': 'Match Type',
+        'search_term': 'Search Term',
+        'roi': 'ROI (%)',
+        'cpa': 'CPA ($)',
+        'cpc': 'CPC ($)'
+    };
+    
+    // Format a table cell based on its column
+    function formatValue(key, value) {
+        if (value === undefined || value === null) {
+            return '-';
+        }
+        if (key === 'cost' || key === 'avg_cpc' || key === 'conversion_value' || key === 'cpa' || key === 'cpc') {
+            return `$${parseFloat(value).toFixed(2)}`;
+        } else if (key === 'ctr' || key === 'conversion_rate' || key === 'interaction_rate' || key === 'roi') {
+            return `${parseFloat(value).toFixed(2)}%`;
+        } else if (key === 'impressions' || key === 'clicks' || key === 'video_views') {
+            return parseInt(value).toLocaleString();
+        } else if (key === 'conversions' || key === 'view_through_conversions') {
+            return parseFloat(value).toFixed(2);
+        }
+        return value;
+    }
+    
+    // Reset table filters for a new query and load its first page
+    function updateDataTable(data) {
+        fillFilterOptions('raw-filter-channel', 'All channels', (data.channel_data || []).map(item => item.channel_name));
+        fillFilterOptions('raw-filter-status', 'All statuses', (data.status_data || []).map(item => item.status));
+        
+        rawTableState.offset = 0;
+        rawTableState.campaign = '';
+        rawTableState.channel = '';
+        rawTableState.status = '';
+        
+        const campaignFilter = document.getElementById('raw-filter-campaign');
+        if (campaignFilter) {
+            campaignFilter.value = '';
+        }
+        
+        loadDataTablePage();
+    }
+    
+    function fillFilterOptions(selectId, allLabel, values) {
+        const select = document.getElementById(selectId);
+        if (!select) {
             return;
         }
         
+        select.innerHTML = '';
+        [''].concat(values).forEach(value => {
+            const option = document.createElement('option');
+            option.value = value;
+            option.textContent = value || allLabel;
+            select.appendChild(option);
+        });
+    }
+    
+    // Fetch one page of raw rows with the current sort and filters
+    async function loadDataTablePage() {
+        const params = new URLSearchParams({
+            offset: rawTableState.offset,
+            limit: rawTableState.limit,
+            order: rawTableState.order
+        });
+        ['sort', 'campaign', 'channel', 'status'].forEach(key => {
+            if (rawTableState[key]) {
+                params.set(key, rawTableState[key]);
+            }
+        });
+        
+        try {
+            const response = await fetch('/raw_data?' + params.toString());
+            if (!response.ok) {
+                throw new Error('Failed to fetch raw data');
+            }
+            renderDataTable(await response.json());
+        } catch (error) {
+            console.error('Error fetching raw data:', error);
+        }
+    }
+    
+    // Render a page of raw rows
+    function renderDataTable(page) {
         const tableContainer = document.getElementById('data-table-container');
         if (!tableContainer) {
             console.error('Data table container not found');
@@ -1483,49 +1720,38 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Clear existing table
         tableContainer.innerHTML = '';
+        updatePager(page);
+        
+        if (!page.rows || page.rows.length === 0) {
+            console.warn('No raw data available for table');
+            return;
+        }
         
         // Create table element
         const table = document.createElement('table');
         table.className = 'data-table';
         
-        // Create table header
+        // Create table header (click to sort on the server)
         const thead = document.createElement('thead');
         const headerRow = document.createElement('tr');
         
-        // Get all unique keys from the data
-        const allKeys = [];
-        rawData.forEach(item => {
-            Object.keys(item).forEach(key => {
-                if (!allKeys.includes(key)) {
-                    allKeys.push(key);
-                }
-            });
-        });
-        
-        // Format column headers
-        const displayHeaders = {
-            'campaign_id': 'Campaign ID',
-            'campaign_name': 'Campaign Name',
-            'status': 'Status',
-            'channel_type': 'Channel Type',
-            'date': 'Date',
-            'impressions': 'Impressions',
-            'clicks': 'Clicks',
-            'ctr': 'CTR (%)',
-            'avg_cpc': 'Avg. CPC ($)',
-            'conversions': 'Conversions',
-            'conversion_value': 'Conv. Value ($)',
-            'cost': 'Cost ($)',
-            'conversion_rate': 'Conv. Rate (%)',
-            'interaction_rate': 'Interaction Rate (%)',
-            'video_views': 'Video Views',
-            'view_through_conversions': 'View-Through Conv.'
-        };
-        
-        // Create header cells
-        allKeys.forEach(key => {
+        page.columns.forEach(key => {
             const th = document.createElement('th');
             th.textContent = displayHeaders[key] || key;
+            th.className = 'sortable';
+            if (rawTableState.sort === key) {
+                th.textContent += rawTableState.order === 'asc' ? ' \u25B2' : ' \u25BC';
+            }
+            th.addEventListener('click', function() {
+                if (rawTableState.sort === key) {
+                    rawTableState.order = rawTableState.order === 'asc' ? 'desc' : 'asc';
+                } else {
+                    rawTableState.sort = key;
+                    rawTableState.order = 'asc';
+                }
+                rawTableState.offset = 0;
+                loadDataTablePage();
+            });
             headerRow.appendChild(th);
         });
         
@@ -1536,25 +1762,12 @@ document.addEventListener('DOMContentLoaded', function() {
         const tbody = document.createElement('tbody');
         
         // Add data rows
-        rawData.forEach(item => {
+        page.rows.forEach(item => {
             const row = document.createElement('tr');
             
-            allKeys.forEach(key => {
+            page.columns.forEach(key => {
                 const td = document.createElement('td');
-                let value = item[key];
-                
-                // Format values based on column type
-                if (key === 'cost' || key === 'avg_cpc' || key === 'conversion_value') {
-                    value = value !== undefined ? `$${parseFloat(value).toFixed(2)}` : '-';
-                } else if (key === 'ctr' || key === 'conversion_rate' || key === 'interaction_rate') {
-                    value = value !== undefined ? `${parseFloat(value).toFixed(2)}%` : '-';
-                } else if (key === 'impressions' || key === 'clicks' || key === 'video_views') {
-                    value = value !== undefined ? parseInt(value).toLocaleString() : '-';
-                } else if (key === 'conversions' || key === 'view_through_conversions') {
-                    value = value !== undefined ? parseFloat(value).toFixed(2) : '-';
-                }
-                
-                td.textContent = value !== undefined ? value : '-';
+                td.textContent = formatValue(key, item[key]);
                 row.appendChild(td);
             });
             
@@ -1564,4 +1777,197 @@ document.addEventListener('DOMContentLoaded', function() {
         table.appendChild(tbody);
         tableContainer.appendChild(table);
     }
+    
+    function updatePager(page) {
+        const pageInfo = document.getElementById('raw-page-info');
+        const prevButton = document.getElementById('raw-prev-page');
+        const nextButton = document.getElementById('raw-next-page');
+        
+        if (pageInfo) {
+            const first = page.total === 0 ? 0 : page.offset + 1;
+            const last = Math.min(page.offset + page.limit, page.total);
+            pageInfo.textContent = `${first.toLocaleString()}-${last.toLocaleString()} of ${page.total.toLocaleString()}`;
+        }
+        if (prevButton) {
+            prevButton.disabled = page.offset === 0;
+        }
+        if (nextButton) {
+            nextButton.disabled = page.next_offset === null;
+        }
+    }
+    
+    // Raw data table controls
+    const prevPageButton = document.getElementById('raw-prev-page');
+    const nextPageButton = document.getElementById('raw-next-page');
+    
+    if (prevPageButton) {
+        prevPageButton.addEventListener('click', function() {
+            rawTableState.offset = Math.max(rawTableState.offset - rawTableState.limit, 0);
+            loadDataTablePage();
+        });
+    }
+    
+    if (nextPageButton) {
+        nextPageButton.addEventListener('click', function() {
+            rawTableState.offset += rawTableState.limit;
+            loadDataTablePage();
+        });
+    }
+    
+    let campaignFilterTimer = null;
+    const campaignFilterInput = document.getElementById('raw-filter-campaign');
+    if (campaignFilterInput) {
+        campaignFilterInput.addEventListener('input', function() {
+            // Debounce typing so each keystroke does not hit the server
+            clearTimeout(campaignFilterTimer);
+            campaignFilterTimer = setTimeout(() => {
+                rawTableState.campaign = campaignFilterInput.value.trim();
+                rawTableState.offset = 0;
+                loadDataTablePage();
+            }, 300);
+        });
+    }
+    
+    [['raw-filter-channel', 'channel'], ['raw-filter-status', 'status']].forEach(([selectId, key]) => {
+        const select = document.getElementById(selectId);
+        if (select) {
+            select.addEventListener('change', function() {
+                rawTableState[key] = select.value;
+                rawTableState.offset = 0;
+                loadDataTablePage();
+            });
+        }
+    });
+    
+    // Drill-down below one campaign: rows are fetched per campaign only when it is opened
+    const drilldownColumns = {
+        ad_group: ['ad_group_name', 'status', 'impressions', 'clicks', 'ctr', 'cost', 'cpc', 'conversions', 'cpa', 'roi'],
+        keyword: ['keyword', 'match_type', 'ad_group_name', 'impressions', 'clicks', 'ctr', 'cost', 'cpc', 'conversions', 'cpa', 'roi'],
+        search_term: ['search_term', 'ad_group_name', 'impressions', 'clicks', 'ctr', 'cost', 'cpc', 'conversions', 'cpa', 'roi']
+    };
+    
+    const drilldownState = {
+        query: null,
+        campaignName: null,
+        adGroupId: null,
+        adGroupName: null
+    };
+    
+    const drilldownLevel = document.getElementById('drilldown-level');
+    const drilldownInfo = document.getElementById('drilldown-info');
+    
+    function resetDrilldown(query) {
+        drilldownState.query = query;
+        drilldownState.campaignName = null;
+        drilldownState.adGroupId = null;
+        drilldownState.adGroupName = null;
+        if (drilldownInfo) {
+            drilldownInfo.textContent = 'Click a campaign in the cost chart to drill down';
+        }
+        const container = document.getElementById('drilldown-table-container');
+        if (container) {
+            container.innerHTML = '';
+        }
+    }
+    
+    async function loadDrilldown() {
+        if (!drilldownState.query || !drilldownState.campaignName || !drilldownLevel) {
+            return;
+        }
+        
+        const level = drilldownLevel.value;
+        const body = Object.assign({ campaign_names: [drilldownState.campaignName] }, drilldownState.query);
+        let scope = drilldownState.campaignName;
+        if (drilldownState.adGroupId && level !== 'ad_group') {
+            body.ad_group_ids = [drilldownState.adGroupId];
+            scope += ` \u203A ${drilldownState.adGroupName}`;
+        }
+        if (drilldownInfo) {
+            drilldownInfo.textContent = `Loading ${scope}...`;
+        }
+        
+        try {
+            const response = await fetch('/drilldown/' + level, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify(body)
+            });
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.error || 'Failed to fetch drill-down data');
+            }
+            if (drilldownInfo) {
+                const shown = data.rows.length < data.total_rows ? `top ${data.rows.length} of ` : '';
+                drilldownInfo.textContent = `${scope}: ${shown}${data.total_rows.toLocaleString()} rows`;
+            }
+            renderDrilldown(level, data.rows);
+        } catch (error) {
+            console.error('Error fetching drill-down data:', error);
+            if (drilldownInfo) {
+                drilldownInfo.textContent = 'Error: ' + error.message;
+            }
+        }
+    }
+    
+    function renderDrilldown(level, rows) {
+        const container = document.getElementById('drilldown-table-container');
+        if (!container) {
+            return;
+        }
+        container.innerHTML = '';
+        if (!rows.length) {
+            return;
+        }
+        
+        const columns = drilldownColumns[level];
+        const table = document.createElement('table');
+        table.className = 'data-table';
+        
+        const thead = document.createElement('thead');
+        const headerRow = document.createElement('tr');
+        columns.forEach(key => {
+            const th = document.createElement('th');
+            th.textContent = displayHeaders[key] || key;
+            headerRow.appendChild(th);
+        });
+        thead.appendChild(headerRow);
+        table.appendChild(thead);
+        
+        const tbody = document.createElement('tbody');
+        rows.forEach(item => {
+            const row = document.createElement('tr');
+            columns.forEach(key => {
+                const td = document.createElement('td');
+                td.textContent = formatValue(key, item[key]);
+                row.appendChild(td);
+            });
+            
+            // An ad group opens its keywords
+            if (level === 'ad_group') {
+                row.className = 'clickable';
+                row.addEventListener('click', function() {
+                    drilldownState.adGroupId = item.ad_group_id;
+                    drilldownState.adGroupName = item.ad_group_name;
+                    drilldownLevel.value = 'keyword';
+                    loadDrilldown();
+                });
+            }
+            tbody.appendChild(row);
+        });
+        table.appendChild(tbody);
+        container.appendChild(table);
+    }
+    
+    if (drilldownLevel) {
+        drilldownLevel.addEventListener('change', function() {
+            // Back at the ad group level the whole campaign is shown again
+            if (drilldownLevel.value === 'ad_group') {
+                drilldownState.adGroupId = null;
+                drilldownState.adGroupName = null;
+            }
+            loadDrilldown();
+        });
+    }
 });
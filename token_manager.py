@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from lazy_imports import lazy_import
+from singleflight import SingleFlight
+
+google_credentials = lazy_import('google.oauth2.credentials')
+google_requests = lazy_import('google.auth.transport.requests')
+requests = lazy_import('requests')
+
+
+# Caches OAuth access tokens per refresh token (in memory, per worker) and refreshes them
+# refresh_margin_seconds before they expire. Concurrent refreshes of the same refresh token
+# share one token-endpoint round trip: the first caller refreshes, the others wait for it.
+class TokenManager:
+    def __init__(self, client_id, client_secret, token_uri, refresh_margin_seconds=300):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_uri = token_uri
+        self.refresh_margin_seconds = refresh_margin_seconds
+        # hits: served without a round trip (including callers that waited on another's refresh)
+        # misses: token-endpoint refreshes
+        self.hits = 0
+        self.misses = 0
+        self._tokens = {}
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+        self._http = None
+
+    @staticmethod
+    def _key(refresh_token):
+        return hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+
+    def _fresh(self, entry):
+        return entry is not None and entry[1] - self.refresh_margin_seconds > time.time()
+
+    def seed(self, refresh_token, token, expires_at):
+        # Adopt a token obtained elsewhere (OAuth callback, session of another worker) if it is newer
+        if not refresh_token or not token or not expires_at:
+            return
+        key = self._key(refresh_token)
+        with self._lock:
+            current = self._tokens.get(key)
+            if current is None or current[1] < expires_at:
+                self._tokens[key] = (token, expires_at)
+
+    def cached(self, refresh_token):
+        # (token, expires_at) if a fresh token is cached, else (None, None); never refreshes
+        with self._lock:
+            entry = self._tokens.get(self._key(refresh_token))
+        return entry if self._fresh(entry) else (None, None)
+
+    def get_token(self, refresh_token):
+        key = self._key(refresh_token)
+        with self._lock:
+            entry = self._tokens.get(key)
+            if self._fresh(entry):
+                self.hits += 1
+                return entry
+
+        def refresh():
+            # A flight that landed just before this one may already have refreshed
+            with self._lock:
+                entry = self._tokens.get(key)
+                if self._fresh(entry):
+                    return entry, False
+                self.misses += 1
+            entry = self._refresh(refresh_token)
+            with self._lock:
+                self._tokens[key] = entry
+            return entry, True
+
+        (entry, refreshed), shared = self._flights.do(key, refresh)
+        if shared or not refreshed:
+            with self._lock:
+                self.hits += 1
+        return entry
+
+    def _request(self):
+        # One keep-alive HTTP session for the token endpoint, shared by all refreshes
+        if self._http is None:
+            self._http = google_requests.Request(requests.Session())
+        return self._http
+
+    def _refresh(self, refresh_token):
+        started = time.perf_counter()
+        credentials = google_credentials.Credentials(
+            None,
+            refresh_token=refresh_token,
+            token_uri=self.token_uri,
+            client_id=self.client_id,
+            client_secret=self.client_secret
+        )
+        credentials.refresh(self._request())
+        # google-auth reports expiry as a naive UTC datetime
+        expires_at = credentials.expiry.replace(tzinfo=timezone.utc).timestamp()
+        print(f"Refreshed OAuth access token in {time.perf_counter() - started:.3f}s")
+        return credentials.token, expires_at
+
+    def invalidate(self, refresh_token):
+        with self._lock:
+            self._tokens.pop(self._key(refresh_token), None)
+
+    def credentials(self, refresh_token):
+        # google-auth credentials for GoogleAdsClient whose refreshes go through this manager
+        from managed_credentials import ManagedCredentials
+        return ManagedCredentials(self, refresh_token)
+
+
+def to_utc_naive(expires_at):
+    # Epoch seconds -> the naive UTC datetime google-auth expects for Credentials.expiry
+    return datetime.fromtimestamp(expires_at, tz=timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,279 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from lazy_imports import lazy_import
+pd = lazy_import('pandas')
+
+# Per-campaign daily columns kept in the warehouse (same keys fetch_campaign_data produces)
+ROW_COLUMNS = [
+    'campaign_id',
+    'campaign_name',
+    'status',
+    'channel_type',
+    'date',
+    'impressions',
+    'clicks',
+    'ctr',
+    'avg_cpc',
+    'conversions',
+    'conversion_value',
+    'cost',
+    'conversion_rate',
+    'interaction_rate',
+    'video_views',
+    'view_through_conversions'
+]
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS campaign_daily (
+        customer_id TEXT NOT NULL,
+        date TEXT NOT NULL,
+        campaign_id INTEGER NOT NULL,
+        campaign_name TEXT,
+        status TEXT,
+        channel_type TEXT,
+        impressions INTEGER,
+        clicks INTEGER,
+        ctr REAL,
+        avg_cpc REAL,
+        conversions REAL,
+        conversion_value REAL,
+        cost REAL,
+        conversion_rate REAL,
+        interaction_rate REAL,
+        video_views INTEGER,
+        view_through_conversions REAL,
+        PRIMARY KEY (customer_id, date, campaign_id)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS customers (
+        customer_id TEXT PRIMARY KEY,
+        descriptive_name TEXT,
+        currency_code TEXT,
+        time_zone TEXT,
+        manager INTEGER,
+        updated_at REAL NOT NULL
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS customer_clients (
+        manager_id TEXT NOT NULL,
+        client_id TEXT NOT NULL,
+        PRIMARY KEY (manager_id, client_id)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS sync_log (
+        customer_id TEXT NOT NULL,
+        date TEXT NOT NULL,
+        synced_at REAL NOT NULL,
+        PRIMARY KEY (customer_id, date)
+    ) WITHOUT ROWID;
+"""
+
+
+def date_range(start_date, end_date):
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+
+
+def contiguous_ranges(dates):
+    # Collapse a sorted list of 'YYYY-MM-DD' strings into (start, end) runs
+    ranges = []
+    previous = None
+    for date in dates:
+        current = datetime.strptime(date, '%Y-%m-%d')
+        if previous is not None and current - previous == timedelta(days=1):
+            ranges[-1][1] = date
+        else:
+            ranges.append([date, date])
+        previous = current
+    return [tuple(r) for r in ranges]
+
+
+# Local SQLite store of per-campaign daily rows, keyed by customer_id/date/campaign_id.
+# sync_log records when each (customer_id, date) was last pulled from the API so that
+# settled history is read locally and only missing or still-settling days are re-queried.
+class MetricsWarehouse:
+    def __init__(self, path, settling_days=3, refresh_seconds=900):
+        self.path = path
+        self.settling_days = settling_days
+        self.refresh_seconds = refresh_seconds
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps the store safe to share across threads and workers
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _is_stale(self, date, synced_at, now):
+        # A day keeps changing until it is settling_days old; after that one sync is final
+        settled_at = (datetime.strptime(date, '%Y-%m-%d') + timedelta(days=self.settling_days + 1)).timestamp()
+        if now < settled_at:
+            return now - synced_at > self.refresh_seconds
+        return synced_at < settled_at
+
+    def missing_ranges(self, customer_id, start_date, end_date):
+        # Date ranges that must be (re)fetched from the API to serve start_date..end_date
+        with self._connect() as conn:
+            synced = dict(conn.execute(
+                'SELECT date, synced_at FROM sync_log WHERE customer_id = ? AND date BETWEEN ? AND ?',
+                (customer_id, start_date, end_date)
+            ).fetchall())
+
+        now = time.time()
+        stale = [
+            date for date in date_range(start_date, end_date)
+            if date not in synced or self._is_stale(date, synced[date], now)
+        ]
+        return contiguous_ranges(stale)
+
+    @staticmethod
+    def _delete_range(conn, customer_id, start_date, end_date):
+        conn.execute(
+            'DELETE FROM campaign_daily WHERE customer_id = ? AND date BETWEEN ? AND ?',
+            (customer_id, start_date, end_date)
+        )
+
+    @staticmethod
+    def _insert_rows(conn, customer_id, df):
+        if df.empty:
+            return
+        frame = df.reindex(columns=ROW_COLUMNS)
+        frame.insert(0, 'customer_id', customer_id)
+        # Object dtype hands sqlite3 plain Python scalars instead of NumPy ones
+        rows = list(frame.astype(object).itertuples(index=False, name=None))
+        placeholders = ', '.join(['?'] * (len(ROW_COLUMNS) + 1))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO campaign_daily (customer_id, {', '.join(ROW_COLUMNS)}) VALUES ({placeholders})",
+            rows
+        )
+
+    @staticmethod
+    def _mark_synced(conn, customer_id, start_date, end_date):
+        synced_at = time.time()
+        conn.executemany(
+            'INSERT OR REPLACE INTO sync_log (customer_id, date, synced_at) VALUES (?, ?, ?)',
+            [(customer_id, date, synced_at) for date in date_range(start_date, end_date)]
+        )
+
+    def store(self, customer_id, start_date, end_date, df):
+        # Replace everything held for the synced range, then mark each day as synced
+        with self._connect() as conn:
+            self._delete_range(conn, customer_id, start_date, end_date)
+            self._insert_rows(conn, customer_id, df)
+            self._mark_synced(conn, customer_id, start_date, end_date)
+
+    # Streaming variant of store(): clear the range, append batches as they arrive and mark the
+    # range synced only once the stream completed, so an interrupted sync is simply retried.
+    def begin_range(self, customer_id, start_date, end_date):
+        with self._connect() as conn:
+            self._delete_range(conn, customer_id, start_date, end_date)
+
+    def append_rows(self, customer_id, df):
+        with self._connect() as conn:
+            self._insert_rows(conn, customer_id, df)
+
+    def finish_range(self, customer_id, start_date, end_date):
+        with self._connect() as conn:
+            self._mark_synced(conn, customer_id, start_date, end_date)
+
+    def data_version(self, customer_id, start_date, end_date):
+        # Changes whenever any day of the range is (re)synced; None when nothing is stored for it
+        with self._connect() as conn:
+            has_rows = conn.execute(
+                'SELECT EXISTS (SELECT 1 FROM campaign_daily WHERE customer_id = ? AND date BETWEEN ? AND ?)',
+                (customer_id, start_date, end_date)
+            ).fetchone()[0]
+            if not has_rows:
+                return None
+            days, synced_at = conn.execute(
+                'SELECT COUNT(*), MAX(synced_at) FROM sync_log WHERE customer_id = ? AND date BETWEEN ? AND ?',
+                (customer_id, start_date, end_date)
+            ).fetchone()
+        return f'{days}:{synced_at:.6f}'
+
+    def load(self, customer_id, start_date, end_date):
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                f"SELECT {', '.join(ROW_COLUMNS)} FROM campaign_daily "
+                'WHERE customer_id = ? AND date BETWEEN ? AND ? ORDER BY date',
+                conn,
+                params=(customer_id, start_date, end_date)
+            )
+
+    def iter_load(self, customer_id, start_date, end_date, chunksize=50000):
+        # Same rows as load(), yielded in bounded chunks
+        with self._connect() as conn:
+            yield from pd.read_sql_query(
+                f"SELECT {', '.join(ROW_COLUMNS)} FROM campaign_daily "
+                'WHERE customer_id = ? AND date BETWEEN ? AND ? ORDER BY date',
+                conn,
+                params=(customer_id, start_date, end_date),
+                chunksize=chunksize
+            )
+
+    def store_customers(self, customers):
+        # customers: {customer_id: {'descriptive_name', 'currency_code', 'time_zone', 'manager'}}
+        updated_at = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO customers '
+                '(customer_id, descriptive_name, currency_code, time_zone, manager, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                [(customer_id, info.get('descriptive_name'), info.get('currency_code'), info.get('time_zone'),
+                  int(bool(info.get('manager'))), updated_at) for customer_id, info in customers.items()]
+            )
+
+    def load_customers(self, customer_ids):
+        if not customer_ids:
+            return {}
+        placeholders = ', '.join(['?'] * len(customer_ids))
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT customer_id, descriptive_name, currency_code, time_zone, manager FROM customers '
+                f'WHERE customer_id IN ({placeholders})',
+                list(customer_ids)
+            ).fetchall()
+        return {
+            customer_id: {'id': customer_id, 'descriptive_name': name, 'currency_code': currency,
+                          'time_zone': time_zone, 'manager': bool(manager)}
+            for customer_id, name, currency, time_zone, manager in rows
+        }
+
+    def store_customer_clients(self, clients):
+        # clients: {manager_id: [client_id, ...]}, replacing what was stored for each manager
+        with self._connect() as conn:
+            for manager_id, client_ids in clients.items():
+                conn.execute('DELETE FROM customer_clients WHERE manager_id = ?', (manager_id,))
+                conn.executemany(
+                    'INSERT OR IGNORE INTO customer_clients (manager_id, client_id) VALUES (?, ?)',
+                    [(manager_id, client_id) for client_id in client_ids]
+                )
+
+    def load_customer_clients(self, manager_ids):
+        if not manager_ids:
+            return {}
+        placeholders = ', '.join(['?'] * len(manager_ids))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f'SELECT manager_id, client_id FROM customer_clients WHERE manager_id IN ({placeholders})',
+                list(manager_ids)
+            ).fetchall()
+        clients = {}
+        for manager_id, client_id in rows:
+            clients.setdefault(manager_id, []).append(client_id)
+        return clients